@@ -1,25 +1,69 @@
-import dash
-import dash_bootstrap_components as dbc
-from dash import Dash, Input, Output, dcc, html
-import numpy as np
-import pandas as pd
-import plotly.graph_objects as go
-
-app = dash.Dash(
-	external_stylesheets=[dbc.themes.BOOTSTRAP],
-	use_pages=True,
-	suppress_callback_exceptions=True
-)
+import os
+
+from pages.profiling import startup
+
+with startup.step('import libraries'):
+	import dash
+	import dash_bootstrap_components as dbc
+	from dash import Dash, Input, Output, dcc, html
+	import numpy as np
+	import pandas as pd
+	import plotly.graph_objects as go
+	import plotly.io as pio
+
+	from pages import state
+	from pages.figures import template_name
+	from pages.metrics import register_metrics
+	from pages.api import register_api
+	from pages.compression import register_compression
+
+# Every figure of the pages uses the trimmed template (see pages/figures.py). Set before the
+# pages are imported, as some build their figures on import.
+pio.templates.default = template_name
+
+# Build the datasets and model shared by every page before the pages are imported
+with startup.step('shared state'):
+	state.initialize()
+
+with startup.step('app creation and page discovery'), startup.page_imports():
+	app = dash.Dash(
+		external_stylesheets=[dbc.themes.BOOTSTRAP],
+		use_pages=True,
+		suppress_callback_exceptions=True
+	)
 
 server = app.server
+register_metrics(server)
+register_api(server)
+# Registered after the metrics, so responses are compressed before their size is recorded
+register_compression(server)
 
 app.layout = html.Div([
 	dash.page_container
 ])
 
+# Dash completes its setup (callback map, page registry, scripts) on the first request it
+# serves. Serve one now so that happens once, before any worker is forked, instead of racing
+# between the threads handling the first concurrent requests.
+with startup.step('dash server setup'), server.test_client() as client:
+	client.get('/')
+
+# Optional warm-up: render every By Field output into the cache, pinned, before serving
+if os.environ.get('STUB_ENHANCER_PRERENDER') == '1':
+	with startup.step('prerender By Field outputs'):
+		from pages import field
+		field.prerender_field_outputs()
+
+startup.finish()
+
 if __name__ == '__main__':
+	# Watch the model directory for new models to serve (see pages/registry.py). Only for the
+	# development server: under gunicorn each worker starts its own watcher after it is forked
+	# (see gunicorn.conf.py), and the master must not be running threads when it forks.
+	state.model_registry.start()
+
 	app.run_server(
 		host='0.0.0.0',
 		port=8050,
 		debug=False,
-	)
\ No newline at end of file
+	)
@@ -0,0 +1,74 @@
+"""
+Benchmarks of the Dash callbacks of the salary, field and prediction pages. Callbacks are
+called the way Dash calls them, with inputs drawn the way users produce them. The output
+cache is disabled so that every call renders.
+"""
+salary = None
+field = None
+prediction = None
+
+def setup():
+    global salary, field, prediction
+
+    # Building the app imports every page (page modules can only be imported by a Dash app)
+    import app  # noqa: F401
+    from pages import cache, field as field_page, prediction as prediction_page, salary as salary_page
+
+    cache.output_cache = None
+    salary, field, prediction = salary_page, field_page, prediction_page
+
+# SALARY
+# ==============================================================================
+def salary_inputs(rng):
+    credentials = rng.sample(salary.credential_list, rng.randint(1, len(salary.credential_list)))
+    low, high = sorted(rng.sample(range(salary.min_salary, salary.max_salary + 1, 1000), 2))
+    return credentials, [low, high], rng.randint(3, 25)
+
+def bench_update_jobs_by_salary_graph(rng):
+    salary.update_jobs_by_salary_graph(*salary_inputs(rng))
+
+# FIELD
+# ==============================================================================
+def bench_update_fos_salary_text(rng):
+    field.update_fos_salary_text(str(rng.choice(field.list)))
+
+def bench_update_fos_salary_linechart(rng):
+    field.update_fos_salary_linechart(str(rng.choice(field.list)))
+
+def bench_update_fos_certification_graph(rng):
+    field.update_fos_certification_graph(str(rng.choice(field.list)))
+
+# PREDICTION
+# ==============================================================================
+# Users fill in the three dropdowns one at a time, so some calls still have a placeholder.
+def prediction_inputs(rng):
+    credential = rng.choice(prediction.creds_list)
+    field_of_study = rng.choice(prediction.field_list)
+    years = rng.choice(prediction.yrs_list)
+
+    if rng.random() < 0.1:
+        credential = 'Select Credentials'
+    if rng.random() < 0.1:
+        field_of_study = 'Select Field'
+    if rng.random() < 0.1:
+        years = 'Select Years Experience'
+    return credential, field_of_study, years
+
+def bench_update_prediction_text(rng):
+    prediction.update_prediction_text(*prediction_inputs(rng))
+
+def bench_update_prediction_trajectory(rng):
+    prediction.update_prediction_trajectory(*prediction_inputs(rng))
+
+def bench_update_network_cytoscape(rng):
+    prediction.update_network_cytoscape(*prediction_inputs(rng))
+
+BENCHMARKS = {
+    'callbacks.salary.update_jobs_by_salary_graph': bench_update_jobs_by_salary_graph,
+    'callbacks.field.update_fos_salary_text': bench_update_fos_salary_text,
+    'callbacks.field.update_fos_salary_linechart': bench_update_fos_salary_linechart,
+    'callbacks.field.update_fos_certification_graph': bench_update_fos_certification_graph,
+    'callbacks.prediction.update_prediction_text': bench_update_prediction_text,
+    'callbacks.prediction.update_prediction_trajectory': bench_update_prediction_trajectory,
+    'callbacks.prediction.update_network_cytoscape': bench_update_network_cytoscape,
+}
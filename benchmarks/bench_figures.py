@@ -0,0 +1,68 @@
+"""
+Benchmarks of the figures of the pages as they are sent: each benchmark builds one figure
+and serializes it to JSON the way Dash does, and returns the size of the JSON, which is
+recorded as its payload_bytes (before any compression, see pages/compression.py). The
+output cache is disabled so that every call builds.
+"""
+home = None
+salary = None
+field = None
+prediction = None
+to_json = None
+
+def setup():
+    global home, salary, field, prediction, to_json
+
+    import app  # noqa: F401
+    from plotly.io.json import to_json_plotly
+    from pages import cache, field as field_page, home as home_page, prediction as prediction_page, salary as salary_page
+
+    cache.output_cache = None
+    home, salary, field, prediction = home_page, salary_page, field_page, prediction_page
+    to_json = to_json_plotly
+
+def payload_size(component):
+    return len(to_json(component).encode())
+
+# HOME
+# ==============================================================================
+def bench_home_jobs_happiness_scatterplot(rng):
+    return payload_size(home.jobs_happiness_scatterplot())
+
+def bench_home_certification_salaries_barchart(rng):
+    return payload_size(home.certification_salaries_barchart())
+
+def bench_home_top_vs_bottom_5_barchart(rng):
+    return payload_size(home.top_vs_bottom_5_barchart())
+
+# SALARY
+# ==============================================================================
+def bench_salary_jobs_by_salary_graph(rng):
+    credentials = rng.sample(salary.credential_list, rng.randint(1, len(salary.credential_list)))
+    low, high = sorted(rng.sample(range(salary.min_salary, salary.max_salary + 1, 1000), 2))
+    return payload_size(salary.update_jobs_by_salary_graph(credentials, [low, high], rng.randint(3, 25)))
+
+# FIELD
+# ==============================================================================
+def bench_field_salary_linechart(rng):
+    return payload_size(field.update_fos_salary_linechart(str(rng.choice(field.list))))
+
+def bench_field_certification_graph(rng):
+    return payload_size(field.update_fos_certification_graph(str(rng.choice(field.list))))
+
+# PREDICTION
+# ==============================================================================
+# Every field of the dataset, including the few the model never saw, which get no chart.
+def bench_prediction_trajectory(rng):
+    return payload_size(prediction.update_prediction_trajectory(
+        rng.choice(prediction.creds_list), rng.choice(prediction.state.field_list), rng.choice(prediction.yrs_list)))
+
+BENCHMARKS = {
+    'figures.home.jobs_happiness_scatterplot': bench_home_jobs_happiness_scatterplot,
+    'figures.home.certification_salaries_barchart': bench_home_certification_salaries_barchart,
+    'figures.home.top_vs_bottom_5_barchart': bench_home_top_vs_bottom_5_barchart,
+    'figures.salary.update_jobs_by_salary_graph': bench_salary_jobs_by_salary_graph,
+    'figures.field.update_fos_salary_linechart': bench_field_salary_linechart,
+    'figures.field.update_fos_certification_graph': bench_field_certification_graph,
+    'figures.prediction.update_prediction_trajectory': bench_prediction_trajectory,
+}
@@ -0,0 +1,81 @@
+"""
+Benchmarks of the data pipeline and startup stages: regenerating derived_data.csv from the
+original spreadsheet, loading the prediction options and the model (from the exported
+weights and from the Keras file), predicting every possible input with each and with an
+ensemble of the exported weights, and building the figures of the home page.
+"""
+import os
+import tempfile
+
+dataset = None
+home = None
+state = None
+models = None
+grid_matrix = None
+numpy_model = None
+keras_model = None
+ensemble_model = None
+
+# Members of the ensemble benchmarked.
+ensemble_size = 5
+
+def setup():
+    global dataset, home, state, models, grid_matrix, numpy_model, keras_model, ensemble_model
+
+    import app  # noqa: F401
+    from derived_dataset_creation import dataset as dataset_module
+    from pages import encoding, home as home_page, models as models_module, state as state_module
+
+    # Read the original spreadsheet, but write the regenerated CSV out of the way
+    dataset_module.xlsx_file_name = os.path.abspath(os.path.join('derived_dataset_creation', dataset_module.xlsx_file_name))
+    dataset_module.csv_file_name = os.path.join(tempfile.mkdtemp(), 'derived_data.csv')
+    dataset, home, state, models = dataset_module, home_page, state_module, models_module
+
+    encoder = state_module.model_registry.active.encoder
+    grid_matrix = encoder.transform(*encoding.grid(encoder))
+    numpy_model = models.load_model(state.compact_model_path)
+    keras_model = models.load_model(state.keras_model_path)
+    ensemble_model = models.EnsembleModel.from_models([numpy_model] * ensemble_size)
+
+def bench_generate_data_csv(rng):
+    dataset.generate_data_csv()
+
+def bench_load_prediction_options(rng):
+    state.load_prediction_options(state.school_data_path)
+
+def bench_load_numpy_model(rng):
+    models.load_model(state.compact_model_path)
+
+def bench_load_keras_model(rng):
+    models.load_model(state.keras_model_path)
+
+def bench_predict_grid_numpy(rng):
+    numpy_model.predict(grid_matrix)
+
+def bench_predict_grid_keras(rng):
+    keras_model.predict(grid_matrix)
+
+def bench_predict_grid_ensemble(rng):
+    ensemble_model.predict_spread(grid_matrix)
+
+def bench_jobs_happiness_scatterplot(rng):
+    home.jobs_happiness_scatterplot()
+
+def bench_certification_salaries_barchart(rng):
+    home.certification_salaries_barchart()
+
+def bench_top_vs_bottom_5_barchart(rng):
+    home.top_vs_bottom_5_barchart()
+
+BENCHMARKS = {
+    'pipeline.dataset.generate_data_csv': bench_generate_data_csv,
+    'pipeline.state.load_prediction_options': bench_load_prediction_options,
+    'pipeline.models.load_numpy_model': bench_load_numpy_model,
+    'pipeline.models.load_keras_model': bench_load_keras_model,
+    'pipeline.models.predict_grid_numpy': bench_predict_grid_numpy,
+    'pipeline.models.predict_grid_keras': bench_predict_grid_keras,
+    'pipeline.models.predict_grid_ensemble': bench_predict_grid_ensemble,
+    'pipeline.home.jobs_happiness_scatterplot': bench_jobs_happiness_scatterplot,
+    'pipeline.home.certification_salaries_barchart': bench_certification_salaries_barchart,
+    'pipeline.home.top_vs_bottom_5_barchart': bench_top_vs_bottom_5_barchart,
+}
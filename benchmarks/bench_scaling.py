@@ -0,0 +1,129 @@
+"""
+Benchmarks of how the pages and the dataset pipeline scale with the size of the data.
+Each benchmark runs against synthetic datasets at a multiple of the real size (see
+derived_dataset_creation/scale_dataset.py). The multiples are read from
+STUB_ENHANCER_BENCH_SCALES (default "1,10"); larger ones take a while to generate, so run
+them with fewer iterations, for example:
+
+    STUB_ENHANCER_BENCH_SCALES=1,10,100,1000 python -m benchmarks.run --filter scaling --repeat 3
+"""
+import contextlib
+import functools
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+scales = [int(scale) for scale in os.environ.get('STUB_ENHANCER_BENCH_SCALES', '1,10').split(',')]
+
+dataset = None
+scale_dataset = None
+state = None
+home = None
+salary = None
+field = None
+output_dir = None
+
+def setup():
+    global dataset, scale_dataset, state, home, salary, field, output_dir
+
+    import app  # noqa: F401
+    from derived_dataset_creation import dataset as dataset_module, scale_dataset as scale_dataset_module
+    from pages import cache, field as field_page, home as home_page, salary as salary_page, state as state_module
+
+    cache.output_cache = None
+    dataset, scale_dataset, state = dataset_module, scale_dataset_module, state_module
+    home, salary, field = home_page, salary_page, field_page
+    output_dir = tempfile.mkdtemp()
+
+# SCALED DATA
+# ==============================================================================
+# Built on first use, so that a missing optional dependency (openpyxl) only skips these
+# benchmarks, and generation time is not counted.
+@functools.cache
+def original_sheets():
+    return pd.read_excel(scale_dataset.xlsx_path, sheet_name=dataset.get_sheet_names())
+
+@functools.cache
+def scaled_sheets(scale):
+    return scale_dataset.scale_sheets(original_sheets(), scale)
+
+@functools.cache
+def scaled_files(scale):
+    directory = os.path.join(output_dir, f'{scale}x')
+    scale_dataset.generate_scaled_datasets(directory, scale, scaled_sheets=scaled_sheets(scale))
+    return os.path.join(directory, 'derived_data.csv'), os.path.join(directory, 'abSchool.csv')
+
+@functools.cache
+def scaled_derived_df(scale):
+    return pd.read_csv(scaled_files(scale)[0])
+
+@functools.cache
+def scaled_field_options(scale):
+    # The same options as the By Field dropdown, as it would be built from the scaled data
+    derived_df = scaled_derived_df(scale)
+    fields = derived_df['Field of Study (CIP code)']
+    fields = fields.loc[(fields.str.contains('[0-9]{2}.[0-9]{2}', regex=True) == False) & (fields.str.contains('00. Total') == False)]
+    return [str(fos) for fos in np.unique(fields.to_numpy())]
+
+@contextlib.contextmanager
+def using_scaled_data(scale, *modules):
+    derived_df = scaled_derived_df(scale)
+    previous = [module.derived_df for module in modules]
+    for module in modules:
+        module.derived_df = derived_df
+    try:
+        yield
+    finally:
+        for module, df in zip(modules, previous):
+            module.derived_df = df
+
+# BENCHMARKS
+# ==============================================================================
+def bench_derive_dataset(scale, rng):
+    dataset.derive_dataset(scaled_sheets(scale), dataset.get_sheet_names())
+
+def bench_read_derived_data(scale, rng):
+    pd.read_csv(scaled_files(scale)[0])
+
+def bench_load_prediction_options(scale, rng):
+    state.load_prediction_options(scaled_files(scale)[1])
+
+def bench_update_jobs_by_salary_graph(scale, rng):
+    credentials = rng.sample(salary.credential_list, rng.randint(1, len(salary.credential_list)))
+    low, high = sorted(rng.sample(range(salary.min_salary, salary.max_salary + 1, 1000), 2))
+    with using_scaled_data(scale, salary):
+        salary.update_jobs_by_salary_graph(credentials, [low, high], rng.randint(3, 25))
+
+def field_benchmark(callback_name):
+    def bench(scale, rng):
+        field_of_study = rng.choice(scaled_field_options(scale))
+        with using_scaled_data(scale, field):
+            getattr(field, callback_name)(field_of_study)
+    return bench
+
+def home_benchmark(figure_name):
+    def bench(scale, rng):
+        with using_scaled_data(scale, home):
+            getattr(home, figure_name)()
+    return bench
+
+benchmarks = {
+    'dataset.derive_dataset': bench_derive_dataset,
+    'state.read_derived_data': bench_read_derived_data,
+    'state.load_prediction_options': bench_load_prediction_options,
+    'salary.update_jobs_by_salary_graph': bench_update_jobs_by_salary_graph,
+    'field.update_fos_salary_text': field_benchmark('update_fos_salary_text'),
+    'field.update_fos_salary_linechart': field_benchmark('update_fos_salary_linechart'),
+    'field.update_fos_certification_graph': field_benchmark('update_fos_certification_graph'),
+    'home.jobs_happiness_scatterplot': home_benchmark('jobs_happiness_scatterplot'),
+    'home.certification_salaries_barchart': home_benchmark('certification_salaries_barchart'),
+    'home.top_vs_bottom_5_barchart': home_benchmark('top_vs_bottom_5_barchart'),
+}
+
+BENCHMARKS = {
+    f'scaling.{scale}x.{name}': functools.partial(func, scale)
+    for scale in scales
+    for name, func in benchmarks.items()
+}
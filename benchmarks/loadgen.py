@@ -0,0 +1,359 @@
+"""
+Program: loadgen.py
+
+Purpose: synthetic load generator for the Dash callback endpoint (/_dash-update-component).
+         Virtual users replay realistic sessions: filling in and changing the dropdowns on
+         /prediction, dragging the sliders on /salary and switching fields on /field. Each
+         user interaction sends the same callback requests the browser would. At the end,
+         throughput and latency percentiles are reported, overall and per callback.
+
+         Load can be sent to a running server (compare gunicorn worker and thread settings
+         before deploying) or to the app in this process through Flask's test client.
+
+Usage (from the repository root):
+    python -m benchmarks.loadgen --url http://127.0.0.1:8050 --users 16 --duration 30
+    python -m benchmarks.loadgen --in-process --users 4 --sessions 50 --output load.json
+"""
+import argparse
+import collections
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+
+repository_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+endpoint = '/_dash-update-component'
+
+# Dropdown and slider values offered by the pages. Kept here so that load can be sent to a
+# remote server without loading the application.
+credentials = ["Certificate", "Diploma", "Bachelor's degree", "Professional bachelor's degree", "Master's degree", "Doctoral degree"]
+salary_credentials = ["Certificate", "Diploma", "Bachelor's degree", "Professional bachelor's degree", "Master's degree", "Doctoral Degree"]
+years = [1, 2, 3, 4, 5]
+prediction_fields = [
+    'Agriculture, agriculture operations and related sciences', 'Architecture and related services',
+    'Business, management, marketing and related support services', 'Computer and information sciences and support services',
+    'Education', 'Engineering', 'Engineering technologies and engineering-related fields', 'Health professions and related programs',
+    'Mathematics and statistics', 'Physical sciences', 'Psychology', 'Social sciences', 'Visual and performing arts',
+]
+# Fields of the dataset the model was not trained on. The page does not offer them, but they
+# can still be requested (by an outdated page, or after a model is swapped in), and must be
+# answered with a message rather than an error.
+unknown_prediction_fields = ['Theology and religious vocations', 'Military science, leadership and operational art']
+fields = [
+    '01. Agriculture, agriculture operations and related sciences', '04. Architecture and related services',
+    '11. Computer and information sciences and support services', '13. Education', '14. Engineering',
+    '15. Engineering technologies and engineering-related fields', '27. Mathematics and statistics', '40. Physical sciences',
+    '42. Psychology', '45. Social sciences', '50. Visual and performing arts', '51. Health professions and related programs',
+    '52. Business, management, marketing and related support services',
+]
+salary_bounds = (20000, 200000)
+
+"""
+Function: dash_request()
+
+Purpose: build the body of a callback request as the Dash front end sends it.
+
+Parameters:
+    output: the output, as "component-id.property".
+    inputs: a list of (component id, property, value) tuples.
+    changed: the "component-id.property" of the input that triggered the callback.
+
+Return:
+    the request body.
+"""
+def dash_request(output, inputs, changed):
+    component_id, component_property = output.split('.')
+    return {
+        'output': output,
+        'outputs': {'id': component_id, 'property': component_property},
+        'inputs': [{'id': i, 'property': p, 'value': v} for i, p, v in inputs],
+        'changedPropIds': [changed],
+        'state': [],
+    }
+
+# SESSIONS
+# ==============================================================================
+# A session is a list of interactions; an interaction is the list of callback requests
+# the browser sends for one user action.
+
+def prediction_session(rng):
+    selected = {'input_creds': 'Select Credentials', 'input_field': 'Select Field', 'input_years': 'Select Years Experience'}
+    choices = {'input_creds': credentials, 'input_field': prediction_fields + unknown_prediction_fields, 'input_years': years}
+
+    # Fill in the dropdowns one at a time, then try a few alternatives
+    changes = ['input_creds', 'input_field', 'input_years'] + [rng.choice(list(choices)) for _ in range(rng.randint(1, 5))]
+
+    session = []
+    for component in changes:
+        selected[component] = rng.choice(choices[component])
+        inputs = [(name, 'value', value) for name, value in selected.items()]
+        session.append([
+            dash_request('prediction_output.children', inputs, f'{component}.value'),
+            dash_request('network-cytoscape.children', inputs, f'{component}.value'),
+            dash_request('prediction-trajectory.children', inputs, f'{component}.value'),
+        ])
+    return session
+
+def salary_session(rng):
+    selected_credentials = list(salary_credentials)
+    low, high = 80000, 120000
+    max_items = 10
+
+    session = []
+    for _ in range(rng.randint(2, 6)):
+        action = rng.random()
+        if action < 0.6:
+            # A slider drag sends a request for several intermediate positions
+            target = rng.randrange(salary_bounds[0], salary_bounds[1], 1000)
+            moving_low = rng.random() < 0.5
+            start = low if moving_low else high
+            for position in range(start, target, 5000 if target > start else -5000):
+                if moving_low:
+                    low = min(position, high - 1000)
+                else:
+                    high = max(position, low + 1000)
+                inputs = [('Credential-Checklist', 'value', selected_credentials), ('Salary-Range-Slider', 'value', [low, high]), ('Job-Display-Max', 'value', max_items)]
+                session.append([
+                    dash_request('Jobs-By-Salary-Barchart.children', inputs, 'Salary-Range-Slider.value'),
+                    dash_request('Salary-Range-Min.children', [('Salary-Range-Slider', 'value', [low, high])], 'Salary-Range-Slider.value'),
+                    dash_request('Salary-Range-Max.children', [('Salary-Range-Slider', 'value', [low, high])], 'Salary-Range-Slider.value'),
+                ])
+        else:
+            if action < 0.8:
+                max_items = rng.randint(3, 25)
+                changed = 'Job-Display-Max.value'
+            else:
+                selected_credentials = rng.sample(salary_credentials, rng.randint(1, len(salary_credentials)))
+                changed = 'Credential-Checklist.value'
+            inputs = [('Credential-Checklist', 'value', selected_credentials), ('Salary-Range-Slider', 'value', [low, high]), ('Job-Display-Max', 'value', max_items)]
+            session.append([dash_request('Jobs-By-Salary-Barchart.children', inputs, changed)])
+    return session
+
+def field_session(rng):
+    session = []
+    for field_of_study in rng.sample(fields, rng.randint(1, 5)):
+        inputs = [('FoS', 'value', field_of_study)]
+        session.append([
+            dash_request(output, inputs, 'FoS.value')
+            for output in ('FoS-Salary-Text.children', 'FoS-Yearly-Salary-Linechart.children', 'FoS-Certification-Graph.children')
+        ])
+    return session
+
+# Relative frequency of each kind of session.
+session_mix = [(prediction_session, 0.4), (salary_session, 0.35), (field_session, 0.25)]
+
+# CLIENTS
+# ==============================================================================
+"""
+Class: HTTPClient
+
+Purpose: posts callback requests to a running server over a keep-alive connection.
+         Each virtual user has its own client.
+"""
+class HTTPClient:
+    def __init__(self, url):
+        parsed = urllib.parse.urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.prefix = parsed.path.rstrip('/')
+        self.connection = None
+
+    def post(self, body):
+        data = json.dumps(body)
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request('POST', self.prefix + endpoint, data, {'Content-Type': 'application/json'})
+                response = self.connection.getresponse()
+                payload = response.read()
+                return response.status, len(payload)
+            except (http.client.HTTPException, ConnectionError):
+                # The server may close idle keep-alive connections; reconnect once
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+"""
+Class: InProcessClient
+
+Purpose: posts callback requests to the app in this process through Flask's test client.
+"""
+class InProcessClient:
+    def __init__(self, server):
+        self.client = server.test_client()
+
+    def post(self, body):
+        response = self.client.post(endpoint, json=body)
+        return response.status_code, len(response.data)
+
+# LOAD
+# ==============================================================================
+"""
+Class: LoadResults
+
+Purpose: thread-safe collection of the latency and outcome of every request.
+"""
+class LoadResults:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self.bytes = 0
+        self.sessions = 0
+
+    def record(self, output, seconds, ok, size):
+        with self.lock:
+            self.latencies[output].append(seconds)
+            self.bytes += size
+            if not ok:
+                self.errors[output] += 1
+
+def percentile(ordered, fraction):
+    return ordered[max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))]
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput_per_second': len(ordered) / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': percentile(ordered, 0.50) * 1000,
+        'p95_ms': percentile(ordered, 0.95) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+"""
+Function: run_load()
+
+Purpose: run virtual users, each replaying sessions until the duration has passed or the
+         session budget is spent.
+
+Parameters:
+    make_client: function returning a new client for a virtual user.
+    users: the number of concurrent virtual users.
+    duration: seconds to run for, or None.
+    sessions: total sessions to run, or None.
+    think_time: seconds each user waits between interactions.
+    seed: seed of the session generator.
+
+Return:
+    the LoadResults and the elapsed time in seconds.
+"""
+def run_load(make_client, users, duration=None, sessions=None, think_time=0.0, seed=0):
+    results = LoadResults()
+    budget = {'sessions': sessions}
+    budget_lock = threading.Lock()
+    deadline = time.perf_counter() + duration if duration else None
+    kinds, weights = zip(*session_mix)
+
+    def take_session():
+        with budget_lock:
+            if budget['sessions'] is not None:
+                if budget['sessions'] <= 0:
+                    return False
+                budget['sessions'] -= 1
+        return deadline is None or time.perf_counter() < deadline
+
+    def user(index):
+        rng = random.Random(seed * 1000 + index)
+        client = make_client()
+        while take_session():
+            session = rng.choices(kinds, weights)[0](rng)
+            for interaction in session:
+                for body in interaction:
+                    start = time.perf_counter()
+                    try:
+                        status, size = client.post(body)
+                        ok = status == 200
+                    except Exception:
+                        ok, size = False, 0
+                    results.record(body['output'], time.perf_counter() - start, ok, size)
+                if think_time:
+                    time.sleep(think_time)
+            with results.lock:
+                results.sessions += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+def build_report(results, elapsed, users):
+    all_latencies = [seconds for latencies in results.latencies.values() for seconds in latencies]
+    if not all_latencies:
+        return {'users': users, 'elapsed_seconds': elapsed, 'sessions': results.sessions, 'overall': None, 'callbacks': {}}
+    return {
+        'users': users,
+        'elapsed_seconds': elapsed,
+        'sessions': results.sessions,
+        'bytes_received': results.bytes,
+        'overall': summarize(all_latencies, sum(results.errors.values()), elapsed),
+        'callbacks': {
+            output: summarize(latencies, results.errors[output], elapsed)
+            for output, latencies in sorted(results.latencies.items())
+        },
+    }
+
+def print_report(report):
+    print(f'{report["users"]} users, {report["sessions"]} sessions in {report["elapsed_seconds"]:.1f}s')
+    if report['overall'] is None:
+        print('No requests were sent.')
+        return
+    print(f'{"callback output":<42} {"requests":>9} {"errors":>7} {"req/s":>8} {"p50":>9} {"p95":>9} {"p99":>9} {"max":>9}')
+    rows = list(report['callbacks'].items()) + [('overall', report['overall'])]
+    for name, s in rows:
+        print(f'{name:<42} {s["requests"]:>9} {s["errors"]:>7} {s["throughput_per_second"]:>8.1f} '
+              f'{s["p50_ms"]:>7.1f}ms {s["p95_ms"]:>7.1f}ms {s["p99_ms"]:>7.1f}ms {s["max_ms"]:>7.1f}ms')
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay synthetic user sessions against the Dash callback endpoint.')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='base URL of a running server, such as http://127.0.0.1:8050')
+    target.add_argument('--in-process', action='store_true', help="load the app in this process and use Flask's test client")
+    parser.add_argument('--users', type=int, default=8, help='concurrent virtual users (default 8)')
+    parser.add_argument('--duration', type=float, help='seconds to run for (default 30 unless --sessions is given)')
+    parser.add_argument('--sessions', type=int, help='total number of sessions to run')
+    parser.add_argument('--think-time', type=float, default=0.0, help='seconds between interactions of a user (default 0)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the session generator (default 0)')
+    parser.add_argument('--no-cache', action='store_true', help='disable the output cache (in-process only)')
+    parser.add_argument('--output', help='also write the report to this JSON file')
+    args = parser.parse_args()
+
+    duration = args.duration if (args.duration or args.sessions) else 30.0
+
+    if args.in_process:
+        os.chdir(repository_root)
+        if repository_root not in sys.path:
+            sys.path.insert(0, repository_root)
+        import app
+        from pages import cache
+
+        if args.no_cache:
+            cache.output_cache = None
+        make_client = lambda: InProcessClient(app.server)
+    else:
+        make_client = lambda: HTTPClient(args.url)
+
+    results, elapsed = run_load(make_client, args.users, duration, args.sessions, args.think_time, args.seed)
+    report = build_report(results, elapsed, args.users)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
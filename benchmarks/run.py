@@ -0,0 +1,187 @@
+"""
+Program: run.py
+
+Purpose: runs the benchmark suite and writes the results as JSON, so that results from
+         before and after a change can be compared.
+
+         Every bench_*.py module in this directory defines a BENCHMARKS dictionary mapping
+         a benchmark name to a function taking a random.Random. Each call of the function
+         is one timed iteration; it should draw its inputs from the generator so iterations
+         cover a realistic spread of inputs. A module may also define setup(), which is run
+         once before its benchmarks and is not timed. A function may return the size in bytes
+         of what it produced, such as a serialized figure; the median size is recorded as the
+         benchmark's payload_bytes.
+
+Usage (from the repository root):
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --filter field --compare results.json
+"""
+import argparse
+import datetime
+import gc
+import importlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+repository_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Function: discover()
+
+Purpose: import every benchmark module and collect its benchmarks.
+
+Return:
+    a list of (module, benchmark name, function) tuples.
+"""
+def discover():
+    found = []
+    for file_name in sorted(os.listdir(os.path.dirname(os.path.abspath(__file__)))):
+        if not (file_name.startswith('bench_') and file_name.endswith('.py')):
+            continue
+        module = importlib.import_module(f'benchmarks.{file_name[:-3]}')
+        for name, func in module.BENCHMARKS.items():
+            found.append((module, name, func))
+    return found
+
+"""
+Function: measure()
+
+Purpose: time a benchmark over several iterations, then measure its peak Python memory
+         allocation over one more iteration with tracemalloc (kept separate, because
+         tracing slows everything down).
+
+Parameters:
+    func: the benchmark function.
+    repeat: the number of timed iterations.
+    warmup: the number of untimed iterations run first.
+    seed: seed for the input generator, identical across runs so results are comparable.
+
+Return:
+    a dictionary of timing and memory statistics.
+"""
+def measure(func, repeat, warmup, seed):
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        func(rng)
+
+    times = []
+    sizes = []
+    gc.collect()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = func(rng)
+        times.append(time.perf_counter() - start)
+        if size is not None:
+            sizes.append(size)
+
+    tracemalloc.start()
+    func(rng)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times.sort()
+    result = {
+        'repeat': repeat,
+        'min_seconds': times[0],
+        'median_seconds': statistics.median(times),
+        'mean_seconds': statistics.fmean(times),
+        'p95_seconds': times[max(0, int(round(0.95 * len(times))) - 1)],
+        'max_seconds': times[-1],
+        'peak_memory_bytes': peak,
+    }
+    if sizes:
+        result['payload_bytes'] = statistics.median(sizes)
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repository_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+"""
+Function: compare()
+
+Purpose: print each benchmark's median time, peak memory and payload size next to a previous run.
+
+Parameters:
+    results: the results of this run.
+    baseline: the results of a previous run.
+
+Return:
+    None
+"""
+def compare(results, baseline):
+    print(f'\n{"benchmark":<55} {"before":>10} {"after":>10} {"ratio":>7} {"memory ratio":>13} {"payload ratio":>14}')
+    for name, result in results['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None or 'median_seconds' not in previous or 'median_seconds' not in result:
+            continue
+        ratio = result['median_seconds'] / previous['median_seconds']
+        memory_ratio = result['peak_memory_bytes'] / max(previous['peak_memory_bytes'], 1)
+        payload_ratio = f'{result["payload_bytes"] / max(previous["payload_bytes"], 1):>13.2f}x' if 'payload_bytes' in result and 'payload_bytes' in previous else f'{"-":>14}'
+        print(f'{name:<55} {previous["median_seconds"] * 1000:>8.2f}ms {result["median_seconds"] * 1000:>8.2f}ms {ratio:>6.2f}x {memory_ratio:>12.2f}x {payload_ratio}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the StubEnhancer benchmark suite.')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file to write the results to')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=20, help='timed iterations per benchmark (default 20)')
+    parser.add_argument('--warmup', type=int, default=2, help='untimed iterations per benchmark (default 2)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the input generators (default 0)')
+    parser.add_argument('--compare', help='a previous results file to compare against')
+    args = parser.parse_args()
+
+    # The application reads its data files relative to the repository root
+    os.chdir(repository_root)
+    if repository_root not in sys.path:
+        sys.path.insert(0, repository_root)
+
+    results = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'results': {},
+    }
+
+    set_up = set()
+    for module, name, func in discover():
+        if args.filter not in name:
+            continue
+
+        if module not in set_up and hasattr(module, 'setup'):
+            module.setup()
+        set_up.add(module)
+
+        try:
+            result = measure(func, args.repeat, args.warmup, args.seed)
+        except ImportError as ex:
+            # Optional dependencies (such as openpyxl for the Excel pipeline) may be missing
+            result = {'skipped': str(ex)}
+            print(f'{name:<55} skipped: {ex}')
+        else:
+            payload = f'   payload {result["payload_bytes"] / 1024:>7.1f}KB' if 'payload_bytes' in result else ''
+            print(f'{name:<55} median {result["median_seconds"] * 1000:>9.2f}ms   peak memory {result["peak_memory_bytes"] / 1024:>9.1f}KB{payload}')
+        results['results'][name] = result
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == '__main__':
+    main()
@@ -37,14 +37,12 @@ def get_original_dataset(sheet_names):
     # Read the excel spreadsheet with the provided sheet names
     return pandas.read_excel(xlsx_file_name, sheet_name=sheet_names)
 
-# Generate and save the CSV file from the original dataset
-def generate_data_csv():
-    # Declare the names of each sheet to grab
-    sheet_names = get_sheet_names()
+# Derive the summary dataframe from the dataframes of each sheet of the original dataset
+# (or of sheets in the same format, such as those generated by scale_dataset.py)
+def derive_dataset(sheet_dataframes, sheet_names):
+    # Work on a copy, so the caller's dataframes are left untouched
+    sheet_dataframes = dict(sheet_dataframes)
 
-    # Get the dataframes for each sheet of the original dataset
-    sheet_dataframes = get_original_dataset(sheet_names)
-    
     # Augment each of the read dataframes
     for sheet_name in sheet_dataframes:
         # Remove NA values
@@ -88,6 +86,19 @@ def generate_data_csv():
     # The following line should remove it...
     data_frame['Credential'] = data_frame['Credential'].str.replace('Diploma ', 'Diploma', regex=False)
 
+    return data_frame
+
+# Generate and save the CSV file from the original dataset
+def generate_data_csv():
+    # Declare the names of each sheet to grab
+    sheet_names = get_sheet_names()
+
+    # Get the dataframes for each sheet of the original dataset
+    sheet_dataframes = get_original_dataset(sheet_names)
+
+    # Build the summary dataframe
+    data_frame = derive_dataset(sheet_dataframes, sheet_names)
+
     # Save the file
     global csv_file_name
     data_frame.to_csv(csv_file_name, index=False, na_rep='n/a')
@@ -0,0 +1,288 @@
+"""
+Program: scale_dataset.py
+
+Purpose: generates synthetic, schema-compatible versions of the datasets at a multiple of
+         their real size, to see how the pages and the dataset.py pipeline cope with
+         national-scale data before we have it.
+
+         The original data only covers Alberta, so each multiple adds regions: the other
+         provinces and territories first, then numbered sub-regions of them. Every region
+         repeats the Alberta rows (every credential, and both the 2-digit and the 4-digit
+         CIP codes) under its own field of study names, such as
+         "11.07 Computer science (Ontario)", with incomes and cohort sizes perturbed per
+         region and per row. Alberta keeps its real names and values, so a factor of 1
+         reproduces the original data. Extra graduating cohorts can be appended as well;
+         they grow the spreadsheet the pipeline reads without adding summary rows.
+
+         derived_data.csv is rebuilt from the scaled spreadsheet sheets by the same code
+         as the real one (see dataset.derive_dataset()), so both stay consistent.
+
+Usage (from the repository root):
+    python -m derived_dataset_creation.scale_dataset --factor 100 --output scaled_100x
+    python -m derived_dataset_creation.scale_dataset --factor 10 --extra-cohorts 10 --output scaled_10x
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas
+
+from . import dataset
+
+provinces = [
+    'Alberta',
+    'British Columbia',
+    'Saskatchewan',
+    'Manitoba',
+    'Ontario',
+    'Quebec',
+    'New Brunswick',
+    'Nova Scotia',
+    'Prince Edward Island',
+    'Newfoundland and Labrador',
+    'Yukon',
+    'Northwest Territories',
+    'Nunavut',
+]
+
+# Paths of the real datasets
+xlsx_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), dataset.xlsx_file_name)
+school_data_path = os.path.join('.', 'abSchool.csv')
+
+# Columns holding a field of study name
+sheet_field_columns = ['Field of Study (CIP code)']
+school_field_columns = ['Field of Study (2-digit CIP code)', 'Field of Study (4-digit CIP code)']
+
+"""
+Function: region_names()
+
+Purpose: name the regions of a scaled dataset.
+
+Parameters:
+    factor: the number of regions.
+
+Return:
+    a list of region names, starting with Alberta.
+"""
+def region_names(factor):
+    names = []
+    for i in range(factor):
+        province = provinces[i % len(provinces)]
+        series = i // len(provinces)
+        names.append(province if series == 0 else f'{province} region {series + 1}')
+    return names
+
+"""
+Function: region_factors()
+
+Purpose: draw how incomes and cohort sizes in each region differ from Alberta's.
+
+Parameters:
+    factor: the number of regions.
+    rng: a numpy random Generator.
+
+Return:
+    arrays of income and cohort size multipliers, one per region (1.0 for Alberta).
+"""
+def region_factors(factor, rng):
+    income = rng.uniform(0.85, 1.15, factor)
+    size = rng.lognormal(0.0, 0.6, factor)
+    income[0] = size[0] = 1.0
+    return income, size
+
+"""
+Function: replicate()
+
+Purpose: repeat a dataframe once per region, renaming its fields of study and scaling its
+         incomes and cohort sizes.
+
+Parameters:
+    df: the Alberta dataframe.
+    regions: the region names (the first is Alberta and is copied as-is).
+    income_factors: income multiplier of each region.
+    size_factors: cohort size multiplier of each region.
+    field_columns: the columns holding field of study names.
+    rng: a numpy random Generator, for the per-row noise.
+    parse: converts an income or size column to floats.
+    format_income: converts scaled incomes back to the column's format.
+    format_size: converts scaled cohort sizes back to the column's format.
+
+Return:
+    the scaled dataframe.
+"""
+def replicate(df, regions, income_factors, size_factors, field_columns, rng, parse, format_income, format_size):
+    factor = len(regions)
+    rows = len(df.index)
+    region = np.repeat(np.arange(factor), rows)
+
+    scaled = pandas.concat([df] * factor, ignore_index=True)
+
+    suffixes = pandas.Series([''] + [f' ({name})' for name in regions[1:]]).take(region).to_numpy()
+    for column in field_columns:
+        scaled[column] = scaled[column].astype(str) + suffixes
+
+    # Alberta keeps its real values; every other region gets its own level plus per-row noise
+    income_noise = rng.normal(1.0, 0.05, rows * factor)
+    size_noise = rng.normal(1.0, 0.15, rows * factor).clip(0.3)
+    income_noise[:rows] = size_noise[:rows] = 1.0
+
+    income = np.tile(parse(df['Median Income']), factor) * income_factors[region] * income_noise
+    size = np.tile(parse(df['Cohort Size']), factor) * size_factors[region] * size_noise
+    scaled['Median Income'] = format_income(income, region)
+    scaled['Cohort Size'] = format_size(size, region)
+    return scaled
+
+"""
+Function: add_cohorts()
+
+Purpose: append later graduating cohorts to a spreadsheet sheet, continuing the income
+         trend of each field.
+
+Parameters:
+    sheet: dataframe of one sheet of the spreadsheet.
+    extra_cohorts: the number of graduating cohorts to add.
+    rng: a numpy random Generator.
+
+Return:
+    the sheet with the new cohorts.
+"""
+def add_cohorts(sheet, extra_cohorts, rng):
+    if extra_cohorts <= 0:
+        return sheet
+
+    last_cohort = sheet['Graduating Cohort'].max()
+    latest = sheet.loc[sheet['Graduating Cohort'] == last_cohort]
+    new_sheets = [sheet]
+    for i in range(1, extra_cohorts + 1):
+        cohort = latest.copy()
+        cohort['Graduating Cohort'] = last_cohort + i
+        # About 2% growth a year
+        growth = 1.02 ** i * rng.normal(1.0, 0.03, len(cohort.index))
+        cohort['Median Income'] = (cohort['Median Income'] * growth / 100).round() * 100
+        cohort['Cohort Size'] = (cohort['Cohort Size'] * rng.normal(1.0, 0.1, len(cohort.index)) / 10).round().clip(1) * 10
+        new_sheets.append(cohort)
+    return pandas.concat(new_sheets, ignore_index=True)
+
+def round_to(values, multiple, region):
+    # Alberta's values are kept exactly as they were
+    rounded = np.round(values / multiple) * multiple
+    return np.where(region == 0, values, np.maximum(rounded, multiple))
+
+"""
+Function: scale_sheets()
+
+Purpose: build synthetic sheets of the original spreadsheet at a multiple of its size.
+
+Parameters:
+    sheet_dataframes: dictionary of sheet name to the dataframe of each real sheet.
+    factor: the number of regions.
+    extra_cohorts: the number of graduating cohorts to add to every region.
+    seed: seed of the random generator.
+
+Return:
+    a dictionary of sheet name to scaled dataframe.
+"""
+def scale_sheets(sheet_dataframes, factor, extra_cohorts=0, seed=0):
+    rng = np.random.default_rng(seed)
+    regions = region_names(factor)
+    income_factors, size_factors = region_factors(factor, rng)
+
+    scaled = {}
+    for sheet_name, sheet in sheet_dataframes.items():
+        sheet = replicate(
+            sheet, regions, income_factors, size_factors, sheet_field_columns, rng,
+            parse=lambda column: pandas.to_numeric(column).to_numpy(dtype=float),
+            format_income=lambda values, region: round_to(values, 100, region),
+            format_size=lambda values, region: round_to(values, 10, region)
+        )
+        scaled[sheet_name] = add_cohorts(sheet, extra_cohorts, rng)
+    return scaled
+
+def parse_currency(column):
+    return pandas.to_numeric(column.str.replace('[$,]', '', regex=True), errors='coerce').to_numpy(dtype=float)
+
+def format_currency(values, region):
+    values = round_to(values, 100, region)
+    return pandas.Series([f'${value:,.0f} ' if value == value else np.nan for value in values], dtype=object)
+
+def format_count(values, region):
+    values = round_to(values, 10, region)
+    return pandas.Series([f'{value:.0f}' if value == value else np.nan for value in values], dtype=object)
+
+"""
+Function: scale_school_data()
+
+Purpose: build a synthetic abSchool.csv dataframe at a multiple of its size. Values keep
+         the file's formats (incomes such as "$34,000 ", blanks where data is suppressed).
+
+Parameters:
+    school_df: the real abSchool.csv, read with every column as a string.
+    factor: the number of regions.
+    seed: seed of the random generator.
+
+Return:
+    the scaled dataframe.
+"""
+def scale_school_data(school_df, factor, seed=0):
+    rng = np.random.default_rng(seed)
+    regions = region_names(factor)
+    income_factors, size_factors = region_factors(factor, rng)
+
+    scaled = replicate(
+        school_df, regions, income_factors, size_factors, school_field_columns, rng,
+        parse=parse_currency, format_income=format_currency, format_size=format_count
+    )
+
+    # Copy Alberta's values verbatim, including any formatting the parser would lose
+    rows = len(school_df.index)
+    for column in ['Median Income', 'Cohort Size']:
+        scaled.loc[:rows - 1, column] = school_df[column].to_numpy()
+    return scaled
+
+"""
+Function: generate_scaled_datasets()
+
+Purpose: write scaled derived_data.csv and abSchool.csv files.
+
+Parameters:
+    output_dir: the directory to write both files to.
+    factor: the number of regions.
+    extra_cohorts: the number of graduating cohorts to add.
+    seed: seed of the random generator.
+    scaled_sheets: sheets already built by scale_sheets(), instead of scaling the real ones.
+
+Return:
+    the scaled derived dataframe and abSchool dataframe.
+"""
+def generate_scaled_datasets(output_dir, factor, extra_cohorts=0, seed=0, scaled_sheets=None):
+    sheet_names = dataset.get_sheet_names()
+    if scaled_sheets is None:
+        sheets = pandas.read_excel(xlsx_path, sheet_name=sheet_names)
+        scaled_sheets = scale_sheets(sheets, factor, extra_cohorts, seed)
+    derived_df = dataset.derive_dataset(scaled_sheets, sheet_names)
+
+    school_df = pandas.read_csv(school_data_path, dtype=str, keep_default_na=False, na_values=[''])
+    school_df = scale_school_data(school_df, factor, seed)
+
+    os.makedirs(output_dir, exist_ok=True)
+    derived_df.to_csv(os.path.join(output_dir, 'derived_data.csv'), index=False, na_rep='n/a')
+    school_df.to_csv(os.path.join(output_dir, 'abSchool.csv'), index=False)
+    return derived_df, school_df
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic StubEnhancer datasets at a multiple of the real size.')
+    parser.add_argument('--factor', type=int, default=10, help='size multiple, as a number of regions (default 10)')
+    parser.add_argument('--extra-cohorts', type=int, default=0, help='graduating cohorts to add after 2014 (default 0)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random generator (default 0)')
+    parser.add_argument('--output', help='directory to write the files to (default scaled_<factor>x)')
+    args = parser.parse_args()
+
+    output_dir = args.output or f'scaled_{args.factor}x'
+    start = time.perf_counter()
+    derived_df, school_df = generate_scaled_datasets(output_dir, args.factor, args.extra_cohorts, args.seed)
+    print(f'Wrote {len(derived_df.index)} derived_data.csv rows and {len(school_df.index)} abSchool.csv rows '
+          f'to {output_dir} in {time.perf_counter() - start:.1f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+gunicorn settings for serving StubEnhancer in production.
+
+Every setting can be overridden through the environment:
+
+    STUB_ENHANCER_BIND      address to listen on (default 0.0.0.0:8050)
+    STUB_ENHANCER_WORKERS   worker processes (default: one per CPU core, plus one)
+    STUB_ENHANCER_THREADS   threads per worker (default 4)
+    STUB_ENHANCER_TIMEOUT   seconds before a silent worker is restarted (default 60)
+
+New models published to the model directory are picked up by every worker without a
+restart (see pages/registry.py).
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('STUB_ENHANCER_BIND', '0.0.0.0:8050')
+
+# Callbacks are CPU bound (pandas, Plotly, the model), so scale processes with the cores
+# and use a few threads per worker to overlap request parsing and response writing.
+workers = int(os.environ.get('STUB_ENHANCER_WORKERS', multiprocessing.cpu_count() + 1))
+threads = int(os.environ.get('STUB_ENHANCER_THREADS', '4'))
+worker_class = 'gthread'
+
+# Load the datasets, the model and every page in the master before forking, so the
+# workers share them copy-on-write instead of each loading their own copy.
+preload_app = True
+
+timeout = int(os.environ.get('STUB_ENHANCER_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth; jitter avoids restarting all at once.
+max_requests = 5000
+max_requests_jitter = 500
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # The app is fully loaded at this point. Move every object into the permanent
+    # generation so the garbage collector in the workers never walks (and so never
+    # writes to) the pages holding the shared state, which keeps them shared.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Threads do not survive the fork; give each worker its own model directory watcher.
+    from pages import state
+    state.model_registry.start()
@@ -0,0 +1,222 @@
+"""
+Program: baseline.py
+
+Purpose: a closed-form baseline for the salary model. Every input is categorical (credential,
+         field of study, years after graduation), so a ridge regression on one-hot encodings of
+         those categories and of each pair of them can be solved directly instead of trained.
+         Each cohort's prediction is then its own mean income, shrunk towards the means of the
+         larger groups it belongs to in proportion to how few rows it has. It trains on the
+         same prepared features as DNN(), in milliseconds, so it can be refit on every data
+         refresh.
+
+         Run as a program, it trains the baseline and the DNN on the same split and reports
+         the training time, inference latency and RMSE of both.
+
+Usage (from the repository root):
+    python -m machine_learning.baseline --alpha 5 --output baseline.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+# Default ridge penalty; about the number of rows a cohort needs before its own mean outweighs
+# the means of its larger groups.
+default_alpha = 5.0
+
+"""
+Class: RidgeModel
+
+Purpose: ridge regression on the one-hot credential, field and years categories of the
+         prepared feature matrix (see salary_model.prep_vector_space()), and on the pairs
+         credential x years, credential x field and field x years. The normal equations are
+         accumulated with bincounts over the few columns each row sets, so the one-hot
+         design matrix is never built, and solved in one step.
+"""
+class RidgeModel:
+    def __init__(self, alpha=default_alpha):
+        self.alpha = alpha
+        self.year_index = None
+        self.field_index = None
+        self.credentials = None
+        self.coefficients = None
+
+    # The categories of each row: the encoded years and field take one value per category,
+    # and the credential is the column set in the one-hot columns.
+    def categories(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        return self.year_index.get_indexer(x[:, 0]), self.field_index.get_indexer(x[:, 1]), x[:, 2:].argmax(axis=1)
+
+    """
+    Function: active_columns()
+
+    Purpose: the columns of the design matrix set (to 1) by each row. Categories not seen in
+             training set a column whose coefficient is 0, so they fall back to the groups
+             that are known.
+
+    Parameters:
+        x: the prepared feature matrix.
+
+    Return:
+        an (n x 7) array of column numbers, and the number of columns.
+    """
+    def active_columns(self, x):
+        years, fields, credentials = self.categories(x)
+        n_years, n_fields, n_credentials = len(self.year_index), len(self.field_index), self.credentials
+
+        groups = [
+            (credentials >= 0, credentials, n_credentials),
+            (fields >= 0, fields, n_fields),
+            (years >= 0, years, n_years),
+            (years >= 0, credentials * n_years + years, n_credentials * n_years),
+            (fields >= 0, credentials * n_fields + fields, n_credentials * n_fields),
+            ((fields >= 0) & (years >= 0), fields * n_years + years, n_fields * n_years),
+        ]
+        size = 1 + sum(group_size for _, _, group_size in groups)
+        unknown = size
+
+        columns = [np.zeros(len(years), dtype=np.int64)]
+        start = 1
+        for known, codes, group_size in groups:
+            columns.append(np.where(known, start + codes, unknown))
+            start += group_size
+        return np.column_stack(columns), size
+
+    """
+    Function: fit()
+
+    Purpose: solve the ridge regression. The intercept is not penalized.
+
+    Parameters:
+        x: the prepared feature matrix.
+        y: the target values.
+
+    Return:
+        the model itself.
+    """
+    def fit(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.year_index = pd.Index(np.unique(x[:, 0]))
+        self.field_index = pd.Index(np.unique(x[:, 1]))
+        self.credentials = x.shape[1] - 2
+
+        active, size = self.active_columns(x)
+        gram = np.zeros(size * size)
+        moments = np.zeros(size)
+        for a in range(active.shape[1]):
+            moments += np.bincount(active[:, a], weights=y, minlength=size)
+            for b in range(active.shape[1]):
+                gram += np.bincount(active[:, a] * size + active[:, b], minlength=size * size)
+
+        penalty = np.full(size, float(self.alpha))
+        penalty[0] = 0
+        coefficients = np.linalg.solve(gram.reshape(size, size) + np.diag(penalty), moments)
+        # The column of unknown categories
+        self.coefficients = np.append(coefficients, 0.0)
+        return self
+
+    def predict(self, x):
+        active, _ = self.active_columns(x)
+        return self.coefficients[active].sum(axis=1)
+
+def rmse(predictions, y):
+    return float(np.sqrt(np.mean((np.asarray(predictions, dtype=np.float64).reshape(-1) - y) ** 2)))
+
+"""
+Function: latency()
+
+Purpose: the median time of a prediction function, over one row and over a batch.
+
+Parameters:
+    predict: the function, taking a feature matrix.
+    x: the batch.
+    repeat: the number of timed calls of each.
+
+Return:
+    the median seconds of one row and of the whole batch.
+"""
+def latency(predict, x, repeat=50):
+    def median_time(matrix):
+        predict(matrix)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            predict(matrix)
+            times.append(time.perf_counter() - start)
+        return float(np.median(times))
+    return median_time(x[:1]), median_time(x)
+
+"""
+Function: compare()
+
+Purpose: train the baseline and the DNN on the same split and measure both.
+
+Parameters:
+    features: the prepared features (see salary_model.prepare_features()).
+    alpha: the ridge penalty of the baseline.
+    epochs: the most epochs the DNN trains.
+
+Return:
+    a dict of results (training seconds, latencies, RMSE) per model.
+"""
+def compare(features, alpha=default_alpha, epochs=1000):
+    from sklearn.model_selection import train_test_split
+    from machine_learning import salary_model
+
+    x, y, _ = salary_model.load_features(features)
+    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.25, random_state=42)
+
+    results = {}
+
+    start = time.perf_counter()
+    baseline = RidgeModel(alpha).fit(x_train, y_train)
+    seconds = time.perf_counter() - start
+    row, batch = latency(baseline.predict, x_test)
+    results["ridge"] = {"train_seconds": seconds, "row_latency_seconds": row, "batch_latency_seconds": batch,
+                        "rmse": rmse(baseline.predict(x_test), y_test)}
+
+    start = time.perf_counter()
+    dnn, _ = salary_model.train(x_train, y_train, x_test, y_test, epochs=epochs, verbose=0)
+    seconds = time.perf_counter() - start
+
+    def predict_dnn(matrix):
+        return dnn(np.asarray(matrix, dtype=np.float32), training=False).numpy()[:, 0]
+
+    row, batch = latency(predict_dnn, x_test)
+    results["dnn"] = {"train_seconds": seconds, "row_latency_seconds": row, "batch_latency_seconds": batch,
+                      "rmse": rmse(predict_dnn(x_test), y_test)}
+
+    for result in results.values():
+        result["test_rows"] = len(x_test)
+    return results
+
+def main() -> None:
+    from machine_learning import salary_model
+
+    parser = argparse.ArgumentParser(description="Compare the closed-form baseline with the DNN.")
+    parser.add_argument("--data", default=salary_model.data_path, help="the detailed dataset (default ./abSchool.csv)")
+    parser.add_argument("--alpha", type=float, default=default_alpha, help=f"ridge penalty (default {default_alpha:g})")
+    parser.add_argument("--epochs", type=int, default=1000, help="most epochs the DNN trains (default 1000)")
+    parser.add_argument("--output", help="also save the results to this JSON file")
+    args = parser.parse_args()
+
+    results = compare(salary_model.prepare_features(args.data), args.alpha, args.epochs)
+
+    print(f"{'model':<8}{'train':>12}{'1 row':>12}{'batch':>12}{'RMSE':>10}")
+    for name, result in results.items():
+        print(f"{name:<8}{result['train_seconds'] * 1000:>10.1f}ms{result['row_latency_seconds'] * 1e6:>10.0f}us"
+              f"{result['batch_latency_seconds'] * 1e6:>10.0f}us{result['rmse']:>10,.0f}")
+    print(f"(batch of {results['ridge']['test_rows']} rows)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return None
+
+# program driver
+if __name__ == "__main__":
+    main()
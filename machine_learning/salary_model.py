@@ -1,18 +1,20 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-from IPython.display import set_matplotlib_formats
 import numpy as np
-from scipy.stats import zscore
 import os
+import json
+import time
+import datetime
 import tensorflow as tf
-import statistics
 from sklearn import metrics
-import matplotlib.lines as mlines
 from sklearn.model_selection import train_test_split
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import Dense, Activation
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import Dense
 from tensorflow.keras.callbacks import EarlyStopping
 
+from pages.fingerprint import file_fingerprint
+from pages.profiling import peak_rss_mb
+from pages.target_encoding import TargetEncoder
+
 
 """
 This code outlines some of the formatting performed on the data to prepare it for training.
@@ -23,70 +25,21 @@ NOTE: this code was written in a different environment than the one the applicat
       in. Chances are that running it as is will not work. It is included so that you can 
       see how we developed our salary prediction model. Namely, the steps used in formatting the data
       and the general model strucutre.
-"""
-
-# keep in mind to remove the original categorical data in the orginal dataframe after this function
-# returns the encoded data, then concatenate this data to it.
-"""
-Function: dummy_one_hot_encoding()
-
-Purpose: This function performs hot-one-encoding for categorical values in data. Given a dataframe, target
-         column name, and a prefix. It will create a list of unique categorical values within a category 
-         specified by column_name. It will then call the pd.get_dummies function to create dummy variables.
-         It returns these dummy varaibles so that they can be concatenated to the original data again.
-
-Parameters: 
-    DataFrame df
-    String column_name
-    String pref
-
-Return:
-    DataFrame dummies
-"""
-def dummy_one_hot_encoding(df, column_name, pref="dummy"):
-    
-    # get unique categorical values. 
-    #values = list(df[column_name].unique())
-    #print(f"Number of areas: {len(values)}")
-    #print(f"Values {values}\n")
-
-    # we may want to add something for sorting the data here later, just for viewing
-    # purposes.
-
-    # make dummy vars, a column for each value in the values list
-    dummies = pd.get_dummies(df[column_name], prefix=pref)
-    #print(dummies[0:10])
-
-    #drop the first column, technically more efficient.
-    #dummies = pd.get_dummies(values,prefix=pref, drop_first=True)
-
-    # return dummies variables to be concatenated back to the data
-    return dummies
 
+Usage (from the repository root, so the encoder shared with the app can be imported):
+    python -m machine_learning.salary_model
 """
-Function: calc_smooth_mean()
 
-Purpose: commonly used for target encoding, calculates the smoothed mean for a value we are encoding.
-         The value we encode will get replaced with the smoothed mean, in the units of the target.
+# The model inputs, in the order the model takes them, and its target.
+feature_columns = ["Years After Graduation", "Field of Study (2-digit CIP code)", "cred_Bachelor's degree", "cred_Certificate", "cred_Diploma", "cred_Doctoral degree", "cred_Master's degree", "cred_Professional bachelor's degree"]
+target_column = "Median Income"
 
-Parameters:
-
-Return:
-
-Sources:
-    https://maxhalford.github.io/blog/target-encoding/
-    https://github.com/jeffheaton/t81_558_deep_learning
-"""
-def calc_smooth_mean(df1, df2, global_mean, counts_agg, means_agg, category, target, weight):
-    # Compute the "smoothed" means
-    smooth = (counts_agg * means_agg + weight * global_mean) / (counts_agg + weight)
-    #print(smooth)
-    return smooth
-     # Replace each value with the associated smoothed mean
-    #if df2 is None:
-        #return df1[category].map(smooth)
-    #else:
-        #return df1[category].map(smooth),df2[category].map(smooth.to_dict())
+# The detailed dataset the model is trained on, and where its prepared features are cached.
+data_path = os.path.join(".", "abSchool.csv")
+features_path = os.path.join(".", "salary_features.npz")
+# Version of how the features are prepared. Bump it whenever prep_vector_space(), the
+# TargetEncoder or feature_columns change, so features cached before are prepared again.
+features_version = 1
 
 def plot_loss(history, axs, x_label="epoch", y_label="y") -> None:
     
@@ -130,6 +83,229 @@ def chart_regression(prediction, y, axs, sort=True) -> None:
     #fig.tight_layout()
     return None
 
+"""
+Function: build_model()
+
+Purpose: build and compile the salary prediction network: fully connected hidden layers with
+         relu activations, a single linear output, mean squared error loss and the adam
+         optimizer.
+
+Parameters:
+    input_dim: the number of inputs.
+    hidden_layers: the width of each hidden layer.
+    learning_rate: the learning rate of the adam optimizer.
+
+Return:
+    the compiled model.
+"""
+def build_model(input_dim, hidden_layers=(25, 10), learning_rate=0.001):
+    salary_model = Sequential()
+    for i, width in enumerate(hidden_layers):
+        if i == 0:
+            salary_model.add(Dense(width, input_dim=input_dim, activation='relu')) # Hidden 1
+        else:
+            salary_model.add(Dense(width, activation='relu'))
+    salary_model.add(Dense(1)) # Output
+    salary_model.compile(loss='mean_squared_error', optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate))
+    return salary_model
+
+"""
+Function: early_stopping()
+
+Purpose: the early stopping used when training, which stops once the validation loss stops
+         improving and restores the best weights.
+
+Parameters:
+    verbose: logging level, 0 for none.
+
+Return:
+    the EarlyStopping callback.
+"""
+def early_stopping(verbose=1):
+    return EarlyStopping(
+        # monitor is the quantity being monitored.
+        monitor='val_loss', 
+        # min_delta is the minimum change in the mointored qauntity to qualify as an improvement.
+        min_delta=1e-2,
+        # number of epochs to wait before stopping upon no improvement.
+        patience=10, 
+        # Logging level, 0 for none.
+        verbose=verbose, 
+        mode='auto',
+        # restore the weights as they were number of patience epochs ago.
+        restore_best_weights=True)
+
+"""
+Function: make_dataset()
+
+Purpose: build the tf.data input pipeline feeding the model: the examples are cached after
+         they are first read, shuffled each epoch, batched, and prefetched so the next batch
+         is ready while the current one trains. The pipeline, not the Python loop of fit(),
+         then keeps the model fed as the dataset grows.
+
+Parameters:
+    x: the feature matrix.
+    y: the target values.
+    batch_size: the examples per batch.
+    shuffle: shuffle the examples each epoch (off for validation data).
+    shuffle_buffer: the examples the shuffle draws from; by default all of them.
+    threads: the size of the pipeline's own thread pool; by default TensorFlow's shared one.
+    seed: the random seed of the shuffle.
+
+Return:
+    the tf.data.Dataset.
+"""
+def make_dataset(x, y, batch_size=32, shuffle=True, shuffle_buffer=None, threads=None, seed=42):
+    dataset = tf.data.Dataset.from_tensor_slices((np.asarray(x, dtype=np.float32), np.asarray(y, dtype=np.float32)))
+    dataset = dataset.cache()
+    if shuffle:
+        dataset = dataset.shuffle(shuffle_buffer or len(x), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+    if threads:
+        options = tf.data.Options()
+        options.threading.private_threadpool_size = threads
+        dataset = dataset.with_options(options)
+    return dataset
+
+"""
+Class: EpochThroughput
+
+Purpose: a Keras callback timing each epoch and reporting its training throughput in samples
+         per second (the validation pass included in the time).
+"""
+class EpochThroughput(tf.keras.callbacks.Callback):
+    def __init__(self, samples, verbose=1):
+        super().__init__()
+        self.samples = samples
+        self.verbose = verbose
+        self.epoch_start = None
+        self.samples_per_sec = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self.epoch_start
+        self.samples_per_sec.append(self.samples / seconds)
+        if logs is not None:
+            logs["samples_per_sec"] = self.samples_per_sec[-1]
+        if self.verbose:
+            print(f"Epoch {epoch + 1}: {seconds:.3f}s, {self.samples_per_sec[-1]:,.0f} samples/sec")
+
+"""
+Class: TrainingLog
+
+Purpose: a Keras callback appending the telemetry of a training run to a JSON lines file, so
+         the cost of training configurations can be compared and regressions caught. Every
+         line has the "run" it belongs to and an "event":
+            start: the time, the number of training samples and the configuration.
+            epoch: the epoch, its wall time, samples/sec, the peak RSS so far, loss and val_loss.
+            end: the epochs trained, the epoch early stopping stopped at (null if it did not),
+                 the best epoch and val_loss, the total wall time and the peak RSS.
+"""
+class TrainingLog(tf.keras.callbacks.Callback):
+    def __init__(self, path, samples, config=None, stopping=None):
+        super().__init__()
+        self.path = path
+        self.samples = samples
+        self.config = config or {}
+        # the EarlyStopping callback of the run, to report where it stopped
+        self.stopping = stopping
+        self.run = f"{datetime.datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+        self.train_start = None
+        self.epoch_start = None
+        self.epochs = 0
+        self.best = None
+
+    def write(self, event, **fields):
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"run": self.run, "event": event, **fields}) + "\n")
+
+    def on_train_begin(self, logs=None):
+        self.train_start = time.perf_counter()
+        self.write("start", time=datetime.datetime.now().isoformat(timespec="seconds"), samples=self.samples, config=self.config)
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        now = time.perf_counter()
+        logs = logs or {}
+        self.epochs = epoch + 1
+        val_loss = logs.get("val_loss")
+        if val_loss is not None and (self.best is None or val_loss < self.best[1]):
+            self.best = (epoch + 1, float(val_loss))
+
+        self.write("epoch", epoch=epoch + 1, seconds=now - self.epoch_start, elapsed_seconds=now - self.train_start,
+                   samples_per_sec=self.samples / (now - self.epoch_start), peak_rss_mb=peak_rss_mb(),
+                   loss=float(logs["loss"]) if "loss" in logs else None,
+                   val_loss=float(val_loss) if val_loss is not None else None)
+
+    def on_train_end(self, logs=None):
+        stopped_epoch = self.stopping.stopped_epoch + 1 if self.stopping is not None and self.stopping.stopped_epoch else None
+        self.write("end", epochs=self.epochs, stopped_epoch=stopped_epoch,
+                   best_epoch=self.best[0] if self.best else None, best_val_loss=self.best[1] if self.best else None,
+                   seconds=time.perf_counter() - self.train_start, peak_rss_mb=peak_rss_mb())
+
+"""
+Function: train()
+
+Purpose: build the neural network and train it, stopping early once the validation loss
+         stops improving.
+
+Parameters:
+    x_train, y_train: the training data.
+    x_test, y_test: the validation data.
+    pipeline: feed the model through a tf.data pipeline (see make_dataset()) rather than
+              passing it the arrays.
+    batch_size: the examples per batch.
+    threads: the threads of the tf.data pipeline, by default TensorFlow's shared pool.
+    epochs: the most epochs trained.
+    verbose: logging level of the training, 0 for none.
+    log_path: append the telemetry of the run to this JSON lines file (see TrainingLog).
+
+Return:
+    the trained model and its training history.
+"""
+def train(x_train, y_train, x_test, y_test, pipeline=True, batch_size=32, threads=None, epochs=1000, verbose=2, log_path=None):
+    # Build the neural network
+    salary_model = build_model(x_train.shape[1])
+
+    # defines early stopping requirements and parameters.
+    callback = early_stopping(verbose)
+
+    # reports the samples/sec of every epoch
+    throughput = EpochThroughput(len(x_train), verbose)
+    callbacks = [callback, throughput]
+    if log_path:
+        config = {"pipeline": pipeline, "batch_size": batch_size, "threads": threads, "epochs": epochs,
+                  "layers": [layer.units for layer in salary_model.layers]}
+        callbacks.append(TrainingLog(log_path, len(x_train), config, callback))
+
+    # train the neural network
+    if pipeline:
+        history = salary_model.fit(
+                    # Training x and y values, shuffled and batched
+                    make_dataset(x_train, y_train, batch_size, threads=threads),
+                    validation_data=make_dataset(x_test, y_test, batch_size, shuffle=False, threads=threads),
+                    callbacks=callbacks,
+                    verbose=verbose,
+                    epochs=epochs)
+    else:
+        history = salary_model.fit(
+                    # Training x values   
+                    x_train, 
+                    # Training y values
+                    y_train,
+                    validation_data=(x_test,y_test),
+                    batch_size=batch_size,
+                    callbacks=callbacks,
+                    verbose=verbose,
+                    epochs=epochs)
+
+    return salary_model, history
+
 """
 Function: DNN()
 
@@ -140,7 +316,13 @@ Purpose: This function is used to build the predictive model. It takes a Datafra
          The optimizer is adam. We implement an early stoppping method to prevent over fitting.
 
 Parameters:
-    df: a Dataframe containing the target value and the vectors associated with them.
+    path: the prepared features, saved by save_features().
+    pipeline: feed the model through a tf.data pipeline (see make_dataset()) rather than
+              passing it the arrays.
+    batch_size: the examples per batch.
+    threads: the threads of the tf.data pipeline, by default TensorFlow's shared pool.
+    epochs: the most epochs trained.
+    log_path: append per-epoch telemetry of the run to this JSON lines file.
 
 Return:
     None
@@ -150,13 +332,10 @@ Sources:
     # https://keras.io/api/callbacks/early_stopping/
     # https://github.com/jeffheaton/t81_558_deep_learning
 """
-def DNN(df) -> None:
+def DNN(path=features_path, pipeline=True, batch_size=32, threads=None, epochs=1000, log_path=None) -> None:
 
-    # predictors from df to numpy array	
-    # #"cred_Bachelor's degree", "cred_Certificate", "cred_Diploma", "cred_Doctoral degree", "cred_Master's degree", "cred_Professional bachelor's degree", "Field of Study (2-digit CIP code)"		
-    x = df[["Years After Graduation", "Field of Study (2-digit CIP code)", "cred_Bachelor's degree", "cred_Certificate", "cred_Diploma", "cred_Doctoral degree", "cred_Master's degree", "cred_Professional bachelor's degree"]].values
-    # Target value
-    y = df["Median Income"].values
+    # predictors (in the order of feature_columns) and target values, already numeric
+    x, y, _ = load_features(path)
 
     #split data for training
     x_train, x_test, y_train, y_test = train_test_split(    
@@ -165,37 +344,8 @@ def DNN(df) -> None:
                                     test_size=0.25, 
                                     random_state=42)
 
-    # Build the neural network
-    salary_model = Sequential()
-    salary_model.add(Dense(25, input_dim=x.shape[1], activation='relu')) # Hidden 1
-    salary_model.add(Dense(10, activation='relu')) # Hidden 2
-    salary_model.add(Dense(1)) # Output
-    salary_model.compile(loss='mean_squared_error', optimizer="adam")
-
-    # defines early stopping requirements and parameters.
-    callback = EarlyStopping(
-        # monitor is the quantity being monitored.
-        monitor='val_loss', 
-        # min_delta is the minimum change in the mointored qauntity to qualify as an improvement.
-        min_delta=1e-2,
-        # number of epochs to wait before stopping upon no improvement.
-        patience=10, 
-        # Logging level, 0 for none.
-        verbose=1, 
-        mode='auto',
-        # restore the weights as they were number of patience epochs ago.
-        restore_best_weights=True)
-
-    # train the neural network
-    history = salary_model.fit(
-                # Training x values   
-                x_train, 
-                # Training y values
-                y_train,
-                validation_data=(x_test,y_test),
-                callbacks=[callback],
-                verbose=2,
-                epochs=1000)
+    # Build and train the neural network
+    salary_model, history = train(x_train, y_train, x_test, y_test, pipeline, batch_size, threads, epochs, log_path=log_path)
 
     # Run the now trained model on the test data. Notice we ware using x_test, where
     # above in the fitting of the model we used x_train. Predict will return a series of predictions.
@@ -213,9 +363,13 @@ def DNN(df) -> None:
     score = np.sqrt(metrics.mean_squared_error(test_predictions,y_test))
     print("(RMSE): " + str(score))
 
-    # save the model so we do not have to continuously re-train it.
-    # salary_model.save(os.path.join(".","Salary_Model.h5"))
+    # Nothing is saved here, so a run never replaces the files the app serves. To deploy a
+    # retrained model, export it with train.py, which writes the model together with the
+    # encoder its inputs were encoded with; the app needs both from the same run.
 
+    # matplotlib is only needed for these charts, so training elsewhere (see train.py) does
+    # not import it.
+    import matplotlib.pyplot as plt
     fig, axs = plt.subplots(2, figsize=(12,14))
 
     # Graph the loss and regression outcomes.
@@ -226,87 +380,64 @@ def DNN(df) -> None:
    
     return 0
 
+"""
+Function: encoder_inputs()
+
+Purpose: the columns of the formatted dataset a TargetEncoder is fitted on and encodes.
+
+Parameters:
+    df: the formatted dataset (see format_data()).
+
+Returns:
+    the credential, field of study (without its CIP code, as the app offers it), years
+    after graduation and median income of each row, as arrays.
+"""
+def encoder_inputs(df):
+    # The app offers the fields of study without their CIP codes, so encode them the same way
+    fields = df["Field of Study (2-digit CIP code)"].str.replace('[0-9]{2}. ', '', regex=True)
+    return (df["Credential"].to_numpy(dtype=object), fields.to_numpy(dtype=object),
+            df["Years After Graduation"].to_numpy(), df[target_column].to_numpy(dtype=np.float64))
+
 """
 Function: prep_vector_space()
 
 Purpose: before passing data to a neural network, it must be altered such that a 
-         neural network can use it. Here we encode and normalize the values passed in 
-         the dataframe.
+         neural network can use it. Here we fit an encoder to the data and encode it:
+         the field of study is target encoded, the years after graduation normalized and
+         the credentials one-hot encoded (see TargetEncoder).
 
 Parameters:
     df: the Dataframe we are going to modify such that a neural network
         can use the values with-in it.
+    weight: the smoothing weight of the field of study target encoding.
 Returns:
-    df3: the modified dataframe.
-"""
-def prep_vector_space(df):
-
-    # Compute the global mean based on target 
-    mean = df["Median Income"].mean()
-    # Compute the number of values and the mean of each group
-    agg = df.groupby("Field of Study (2-digit CIP code)")["Median Income"].agg(['count', 'mean'])
-    counts = agg['count']
-    means = agg['mean']
-    # calculate smoothed means
-    smoothed_means = calc_smooth_mean(df1=df, df2=None, global_mean=mean, counts_agg=counts, means_agg=means, category="Field of Study (2-digit CIP code)", target="Median Income", weight=2)
-    # convert to dictionary
-    smoothed_means_dict = smoothed_means.to_dict()
-    #print(smoothed_means_dict)
-    
-    tempa = list(smoothed_means_dict.values())
-    tempb = list(smoothed_means_dict.keys())
-    #print(tempb)
+    df3: the modified dataframe, with the feature_columns and the target column.
+    encoder: the fitted encoder.
+"""
+def prep_vector_space(df, weight=2):
 
-    std = statistics.stdev(tempa)
-    mn = statistics.mean(tempa)
+    credentials, fields, years, incomes = encoder_inputs(df)
+    encoder = TargetEncoder(weight).fit(credentials, fields, years, incomes)
 
-    print(f"std:{std} and mean:{mn}")
+    columns = ["Years After Graduation", "Field of Study (2-digit CIP code)"] + ["cred_" + credential for credential in encoder.credential_index]
+    if columns != feature_columns:
+        raise ValueError(f"The data encodes to the columns {columns}, expected {feature_columns}")
 
-    # replace with smoothed means
-    df1  = df.replace({"Field of Study (2-digit CIP code)": smoothed_means_dict})
-    
-    # UNCOMMENT TO SEE VALUE RANGE BEFORE NORMALIZATION
-    #i=df3["Field of Study (2-digit CIP code)"].min()
-    #l=df3["Field of Study (2-digit CIP code)"].max()
-    #print(i)
-    #print(l)
-    # Normalize "Field of Study (2-digit CIP code)"
-    df1["Field of Study (2-digit CIP code)"] = zscore(df1["Field of Study (2-digit CIP code)"])
-    # UNCOMMENT TO SEE VALUE RANGE AFTER NORMALIZATION
-    #i=df3["Field of Study (2-digit CIP code)"].min()
-    #l=df3["Field of Study (2-digit CIP code)"].max()
-    #print(i)
-    #print(l)
-
-    # Normalize "Years After Graduation"
-    df1["Years After Graduation"] = zscore(df1["Years After Graduation"])
-
-    # remove the Field of Study (4-digit CIP code) column from the dataset
-    df1 = df1.drop(columns="Field of Study (4-digit CIP code)", axis=1)
-    
-    dummies = dummy_one_hot_encoding(df1, "Credential", pref="cred")
-    #print(dummies)
-    
-    #concatenate our dummy variables
-    df2 = pd.concat([df1,dummies],axis=1)
-    #drop the old credentials column
-    df2 = df2.drop(columns="Credential", axis=1)
-    #drop the cohort column
-    df2 = df2.drop(columns="Cohort Size", axis=1)
+    df2 = pd.DataFrame(encoder.transform(credentials, fields, years), columns=feature_columns)
+    df2[target_column] = df[target_column].to_numpy()
 
     #shuffle values
     df3 = df2.reindex(np.random.permutation(df2.index))
     #fix indexes
     df3 = df3.reset_index(inplace=False, drop=True)
 
-    # format the float values of this column to two decimal places.
-    df3["Field of Study (2-digit CIP code)"] = df3["Field of Study (2-digit CIP code)"].map('{:.2f}'.format)
-    df3["Years After Graduation"] = df3["Years After Graduation"].map('{:.3f}'.format)
+    # The values are kept as numbers at full precision; use save_features() rather than
+    # a csv to store them.
     #save_df_to_csv(df3, "alberta_salary_data_edited.csv", path=".")
 
     #display(df3)
 
-    return df3
+    return df3, encoder
 
 """
 Function: format_chart()
@@ -391,18 +522,92 @@ def save_df_to_csv(df, file_name, path=".") -> None:
     return None
 
 """
-This is the start of the program.
+Function: save_features()
+
+Purpose: save a prepared feature matrix, its target values and the encoder that encoded
+         them as a compressed .npz file, keeping every value as a number at full precision.
+
+Parameters:
+    df: the Dataframe returned by prep_vector_space().
+    encoder: the encoder returned by prep_vector_space().
+    path: the file to write.
+    source: identifies what the features were prepared from (see prepare_features()).
+
+Returns:
+    None
 """
-def main() -> None:
+def save_features(df, encoder, path=features_path, source="") -> None:
+    encoder_arrays = {"encoder_" + name: array for name, array in encoder.arrays().items()}
+    np.savez_compressed(
+        path,
+        x=df[feature_columns].to_numpy(dtype=np.float64),
+        y=df[target_column].to_numpy(dtype=np.float64),
+        feature_columns=np.array(feature_columns),
+        source=np.array(source),
+        **encoder_arrays)
+    return None
+
+"""
+Function: load_features()
+
+Purpose: load features saved by save_features().
+
+Parameters:
+    path: the .npz file.
+
+Returns:
+    x: the feature matrix, with columns in the order of feature_columns.
+    y: the target values.
+    encoder: the encoder they were encoded with.
+"""
+def load_features(path=features_path):
+    with np.load(path, allow_pickle=False) as arrays:
+        if list(arrays["feature_columns"]) != feature_columns:
+            raise ValueError(f"{path} holds the features {list(arrays['feature_columns'])}, expected {feature_columns}")
+
+        encoder = TargetEncoder.from_arrays({name[len("encoder_"):]: arrays[name] for name in arrays.files if name.startswith("encoder_")})
+        return arrays["x"], arrays["y"], encoder
+
+"""
+Function: prepare_features()
 
-    df = read_csv_to_df("graduate_earnings.csv",verbose=0,rows=30)
+Purpose: format, encode and normalize the dataset and save the result with save_features().
+         The saved features are reused as long as they were prepared from the same dataset,
+         with the same smoothing weight, by the same features_version and into the same
+         feature_columns, so later training runs skip this step entirely.
 
-    df = format_data(df)
+Parameters:
+    csv_path: the detailed dataset (abSchool.csv).
+    path: where the features are saved.
+    force: prepare the features again even if they are up to date.
+    weight: the smoothing weight of the field of study target encoding.
+
+Returns:
+    path: the saved features.
+"""
+def prepare_features(csv_path=data_path, path=features_path, force=False, weight=2):
+    source = json.dumps({"data": file_fingerprint(csv_path), "weight": float(weight), "version": features_version}, sort_keys=True)
+
+    if not force and os.path.exists(path):
+        with np.load(path, allow_pickle=False) as arrays:
+            if str(arrays["source"]) == source and list(arrays["feature_columns"]) == feature_columns:
+                return path
+
+    df = format_data(pd.read_csv(csv_path))
 
     # Prepare the vector space based on analysis of features.
-    reformed_data = prep_vector_space(df)
+    reformed_data, encoder = prep_vector_space(df, weight)
+    save_features(reformed_data, encoder, path, source)
+    print(f"Prepared features saved to {path}")
+
+    return path
+
+"""
+This is the start of the program.
+"""
+def main() -> None:
 
-    DNN(reformed_data)
+    DNN(prepare_features(data_path, features_path))
 
     return None
 
@@ -0,0 +1,236 @@
+"""
+Program: sweep.py
+
+Purpose: cross-validate many configurations of the salary model at once, to find one that
+         does better than the single 25/10 network DNN() trains on one split. Every
+         combination of hidden layer widths, learning rate and smoothing weight of the field
+         of study encoding is trained on each of k folds, and the RMSE and training time of
+         each configuration is reported.
+
+         Every (configuration, fold) pair is independent, so they are trained in a pool of
+         worker processes. Each worker limits TensorFlow to a single thread, so the workers
+         do not compete with each other for cores; use one worker per core.
+
+         The field of study encoding is fitted to the training rows of each fold only, so
+         the incomes of the held out rows never feed the features they are measured on.
+
+Usage (from the repository root):
+    python -m machine_learning.sweep --layers 25,10 50,20 --learning-rates 0.001 0.01 --smoothing 2 10 --folds 5 --output sweep.json
+"""
+import argparse
+import concurrent.futures
+import itertools
+import json
+import multiprocessing
+import os
+import statistics
+import time
+
+# Limit every TensorFlow started from here, including in the workers, to one thread.
+os.environ.setdefault("TF_NUM_INTRAOP_THREADS", "1")
+os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+
+from machine_learning import salary_model
+from pages.target_encoding import TargetEncoder
+
+"""
+Function: init_worker()
+
+Purpose: set up a worker process: a single TensorFlow thread, before TensorFlow runs anything.
+
+Return:
+    None
+"""
+def init_worker() -> None:
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    return None
+
+"""
+Function: encode_fold()
+
+Purpose: encode the rows of a fold with an encoder fitted to its training rows only. Fields
+         with no training rows in the fold are encoded as the overall mean income, the mean
+         the smoothed field means shrink towards (a field's smoothed mean with no rows).
+
+Parameters:
+    inputs: the credentials, fields, years and incomes of every row (see
+            salary_model.encoder_inputs()).
+    train: the positions of the training rows.
+    test: the positions of the rows held out.
+    smoothing: the smoothing weight of the field of study encoding.
+
+Return:
+    x_train, y_train, x_test, y_test
+"""
+def encode_fold(inputs, train, test, smoothing):
+    credentials, fields, years, incomes = inputs
+    encoder = TargetEncoder(smoothing).fit(credentials[train], fields[train], years[train], incomes[train])
+
+    unseen = pd.Index(np.unique(fields[test])).difference(encoder.field_index)
+    if len(unseen):
+        encoder.field_index = encoder.field_index.append(unseen)
+        encoder.field_means = np.append(encoder.field_means, np.full(len(unseen), incomes[train].mean()))
+
+    def encode(rows):
+        return encoder.transform(credentials[rows], fields[rows], years[rows]).astype(np.float32), incomes[rows].astype(np.float32)
+
+    x_train, y_train = encode(train)
+    x_test, y_test = encode(test)
+    return x_train, y_train, x_test, y_test
+
+"""
+Function: train_fold()
+
+Purpose: encode one fold, train one configuration on it and measure it. Runs in a worker
+         process.
+
+Parameters:
+    config: a dict with the hidden layer widths ("layers"), "learning_rate" and "smoothing".
+    fold: the number of the fold.
+    inputs: the unencoded inputs and incomes of every row (see encode_fold()).
+    train: the positions of the training rows of the fold.
+    test: the positions of the rows held out, used for early stopping and to measure the RMSE.
+    epochs: the most epochs trained.
+    seed: the random seed.
+
+Return:
+    a dict with the configuration, fold, RMSE, epochs trained and training time.
+"""
+def train_fold(config, fold, inputs, train, test, epochs, seed):
+    import tensorflow as tf
+    tf.keras.utils.set_random_seed(seed + fold)
+
+    x_train, y_train, x_test, y_test = encode_fold(inputs, train, test, config["smoothing"])
+
+    start = time.perf_counter()
+    model = salary_model.build_model(x_train.shape[1], config["layers"], config["learning_rate"])
+    history = model.fit(x_train, y_train, validation_data=(x_test, y_test),
+                        callbacks=[salary_model.early_stopping(verbose=0)], verbose=0, epochs=epochs)
+    seconds = time.perf_counter() - start
+
+    predictions = model(x_test, training=False).numpy()[:, 0]
+    rmse = float(np.sqrt(np.mean((predictions - y_test) ** 2)))
+
+    return {"config": config, "fold": fold, "rmse": rmse, "epochs": len(history.history["loss"]), "seconds": seconds}
+
+"""
+Function: summarize()
+
+Purpose: combine the fold results of each configuration.
+
+Parameters:
+    results: the results of train_fold().
+
+Return:
+    one summary per configuration, best (lowest mean RMSE) first.
+"""
+def summarize(results):
+    by_config = {}
+    for result in results:
+        by_config.setdefault(json.dumps(result["config"], sort_keys=True), []).append(result)
+
+    summaries = []
+    for folds in by_config.values():
+        rmses = [fold["rmse"] for fold in folds]
+        summaries.append({
+            "config": folds[0]["config"],
+            "rmse_mean": statistics.mean(rmses),
+            "rmse_std": statistics.stdev(rmses) if len(rmses) > 1 else 0.0,
+            "epochs_mean": statistics.mean(fold["epochs"] for fold in folds),
+            "seconds_mean": statistics.mean(fold["seconds"] for fold in folds),
+            "seconds_total": sum(fold["seconds"] for fold in folds),
+            "folds": sorted(folds, key=lambda fold: fold["fold"]),
+        })
+    return sorted(summaries, key=lambda summary: summary["rmse_mean"])
+
+"""
+Function: sweep()
+
+Purpose: cross-validate every combination of the given settings in a process pool.
+
+Parameters:
+    df: the formatted dataset (see salary_model.format_data()).
+    layers: the hidden layer widths to try, a tuple of widths each.
+    learning_rates: the learning rates to try.
+    smoothing: the smoothing weights of the field of study encoding to try.
+    folds: the number of folds.
+    epochs: the most epochs trained.
+    workers: the number of worker processes.
+    seed: the random seed of the splits, shuffling and weight initialization.
+
+Return:
+    the summaries of summarize(), and the wall time of the whole sweep in seconds.
+"""
+def sweep(df, layers, learning_rates, smoothing, folds=5, epochs=1000, workers=None, seed=42):
+    start = time.perf_counter()
+
+    # Every fold is encoded with an encoder fitted to its own training rows, in the workers
+    inputs = salary_model.encoder_inputs(df)
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=seed).split(inputs[0]))
+    configs = [{"layers": list(widths), "learning_rate": rate, "smoothing": weight}
+               for widths, rate, weight in itertools.product(layers, learning_rates, smoothing)]
+
+    # Workers are started fresh rather than forked, as TensorFlow does not survive a fork
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as pool:
+        futures = []
+        for config in configs:
+            for fold, (train, test) in enumerate(splits):
+                futures.append(pool.submit(train_fold, config, fold, inputs, train, test, epochs, seed))
+
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            print(f"{format_config(result['config'])} fold {result['fold']}: RMSE {result['rmse']:,.0f} "
+                  f"({result['epochs']} epochs, {result['seconds']:.1f}s)", flush=True)
+            results.append(result)
+
+    return summarize(results), time.perf_counter() - start
+
+def format_config(config):
+    return f"layers {'/'.join(str(width) for width in config['layers'])}, lr {config['learning_rate']:g}, smoothing {config['smoothing']:g}"
+
+def parse_layers(value):
+    return tuple(int(width) for width in value.split(","))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cross-validate configurations of the salary model in parallel.")
+    parser.add_argument("--data", default=salary_model.data_path, help="the detailed dataset (default ./abSchool.csv)")
+    parser.add_argument("--layers", nargs="+", type=parse_layers, default=[(25, 10)],
+                        help="hidden layer widths to try, each a comma separated list (default 25,10)")
+    parser.add_argument("--learning-rates", nargs="+", type=float, default=[0.001], help="learning rates to try (default 0.001)")
+    parser.add_argument("--smoothing", nargs="+", type=float, default=[2], help="smoothing weights of the field encoding to try (default 2)")
+    parser.add_argument("--folds", type=int, default=5, help="number of folds (default 5)")
+    parser.add_argument("--epochs", type=int, default=1000, help="most epochs trained (default 1000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default one per core)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (default 42)")
+    parser.add_argument("--output", help="also save the results to this JSON file")
+    args = parser.parse_args()
+
+    df = salary_model.format_data(pd.read_csv(args.data))
+    summaries, seconds = sweep(df, args.layers, args.learning_rates, args.smoothing,
+                               args.folds, args.epochs, args.workers, args.seed)
+
+    training_seconds = sum(summary["seconds_total"] for summary in summaries)
+    print(f"\n{len(summaries)} configurations x {args.folds} folds in {seconds:.1f}s "
+          f"({training_seconds:.1f}s of training, {args.workers} workers)")
+    for summary in summaries:
+        print(f"{format_config(summary['config'])}: RMSE {summary['rmse_mean']:,.0f} +/- {summary['rmse_std']:,.0f}, "
+              f"{summary['epochs_mean']:.0f} epochs, {summary['seconds_mean']:.1f}s per fold")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"folds": args.folds, "workers": args.workers, "seconds": seconds, "configs": summaries}, f, indent=2)
+
+    return None
+
+# program driver
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Program: train.py
+
+Purpose: retrain the salary model without any interaction, for scheduled retraining on build
+         machines. It prepares the features of an abSchool.csv-format dataset, trains the
+         network, measures it on the held out rows, and writes everything the app serves:
+
+            Salary_Model.npz     the exported weights, with the fitted input encoder (see
+                                 pages/models.py and pages/target_encoding.py)
+            Salary_Encoder.npz   the fitted input encoder alone, for the Keras model
+            prediction_grid.csv  the prediction of every credential, field and years
+            Salary_Model.h5      the Keras model itself, with --keras
+
+         With --members N, N networks are trained with different seeds and exported together
+         as an ensemble (see EnsembleModel in pages/models.py), which serves their mean.
+
+         No plotting library is imported. Copy Salary_Model.npz over the served model, or
+         into the watched model directory, to deploy it; it carries its encoder.
+
+Usage (from the repository root):
+    python -m machine_learning.train --data abSchool.csv --output-dir trained_model --metrics metrics.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+import tensorflow as tf
+
+from machine_learning import salary_model
+from pages.target_encoding import prediction_grid
+from pages.models import NumpyModel, KerasModel, EnsembleModel, compare_predictions, precisions, default_tolerance
+
+"""
+Function: train_and_export()
+
+Purpose: train the model, evaluate it and write the serving artifacts.
+
+Parameters:
+    args: the parsed command line.
+
+Return:
+    the metrics of the run, and whether the export is within the tolerance.
+"""
+def train_and_export(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    features = salary_model.prepare_features(args.data, args.features, force=args.force, weight=args.smoothing)
+    x, y, encoder = salary_model.load_features(features)
+    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=args.test_size, random_state=args.seed)
+
+    # Every member of an ensemble differs only by its seed
+    models, histories = [], []
+    start = time.perf_counter()
+    for member in range(args.members):
+        tf.keras.utils.set_random_seed(args.seed + member)
+        model, history = salary_model.train(x_train, y_train, x_test, y_test, batch_size=args.batch_size,
+                                            epochs=args.epochs, verbose=2 if args.verbose else 0, log_path=args.run_log)
+        models.append(model)
+        histories.append(history)
+    train_seconds = time.perf_counter() - start
+
+    if len(models) == 1:
+        reference = KerasModel(models[0])
+        exported = NumpyModel.from_keras(models[0], args.precision)
+    else:
+        reference = EnsembleModel.from_models([NumpyModel.from_keras(model) for model in models])
+        exported = EnsembleModel.from_models([NumpyModel.from_keras(model, args.precision) for model in models])
+    grid = prediction_grid(encoder, exported.predict)
+    grid["Predicted Income"] = grid["Predicted Income"].round(2)
+    # How far the exported weights are from the trained model, on every input the app can send
+    absolute, relative = compare_predictions(reference, exported, encoder.transform(
+        grid["Credential"], grid["Field of Study"], grid["Years After Graduation"]))
+
+    def rmse(predictions):
+        return float(np.sqrt(np.mean((predictions - y_test) ** 2)))
+
+    metrics = {
+        "data": args.data,
+        "rows": len(x),
+        "smoothing": args.smoothing,
+        "train_rows": len(x_train),
+        "test_rows": len(x_test),
+        "members": len(models),
+        "epochs": [len(history.history["loss"]) for history in histories],
+        "best_epoch": [int(np.argmin(history.history["val_loss"])) + 1 for history in histories],
+        "train_seconds": train_seconds,
+        "member_rmse": [rmse(KerasModel(model).predict(x_test)) for model in models],
+        "rmse": rmse(reference.predict(x_test)),
+        "exported_rmse": rmse(exported.predict(x_test)),
+        "precision": args.precision,
+        "export_max_difference": absolute,
+        "export_max_relative_difference": relative,
+        "artifacts": {},
+    }
+
+    exported_ok = absolute <= args.tolerance
+    if exported_ok:
+        artifacts = {
+            "model": os.path.join(args.output_dir, "Salary_Model.npz"),
+            "encoder": os.path.join(args.output_dir, "Salary_Encoder.npz"),
+            "grid": os.path.join(args.output_dir, "prediction_grid.csv"),
+        }
+        exported.save(artifacts["model"], encoder)
+        encoder.save(artifacts["encoder"])
+        grid.to_csv(artifacts["grid"], index=False)
+        if args.keras:
+            for member, model in enumerate(models):
+                name = "keras_model" if len(models) == 1 else f"keras_model_{member}"
+                artifacts[name] = os.path.join(args.output_dir, "Salary_Model.h5" if len(models) == 1 else f"Salary_Model_{member}.h5")
+                model.save(artifacts[name])
+        metrics["artifacts"] = artifacts
+
+    metrics["total_seconds"] = time.perf_counter() - started
+    return metrics, exported_ok
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the salary model and export what the app serves.")
+    parser.add_argument("--data", default=salary_model.data_path, help="the dataset, in the format of abSchool.csv (default ./abSchool.csv)")
+    parser.add_argument("--output-dir", default="trained_model", help="directory the artifacts are written to (default trained_model)")
+    parser.add_argument("--features", default=salary_model.features_path, help="cache of the prepared features (default ./salary_features.npz)")
+    parser.add_argument("--force", action="store_true", help="prepare the features again even if they are up to date")
+    parser.add_argument("--smoothing", type=float, default=2, help="smoothing weight of the field of study encoding (default 2)")
+    parser.add_argument("--epochs", type=int, default=1000, help="most epochs trained (default 1000)")
+    parser.add_argument("--batch-size", type=int, default=32, help="examples per batch (default 32)")
+    parser.add_argument("--test-size", type=float, default=0.25, help="share of the rows held out for evaluation (default 0.25)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed of the split and of the first model (default 42)")
+    parser.add_argument("--members", type=int, default=1, help="train this many models with different seeds and export them as an ensemble (default 1)")
+    parser.add_argument("--precision", choices=precisions, default="float16", help="precision of the exported weights (default float16)")
+    parser.add_argument("--tolerance", type=float, default=default_tolerance,
+                        help=f"largest difference of the exported weights from the trained model, in dollars (default {default_tolerance:g})")
+    parser.add_argument("--keras", action="store_true", help="also save the Keras model as Salary_Model.h5")
+    parser.add_argument("--metrics", help="save the metrics of the run to this JSON file")
+    parser.add_argument("--run-log", help="append per-epoch telemetry (time, samples/sec, peak RSS, losses) to this JSON lines file")
+    parser.add_argument("--verbose", action="store_true", help="log every epoch")
+    args = parser.parse_args()
+
+    metrics, exported_ok = train_and_export(args)
+
+    print(f"Trained {metrics['members']} model(s), {sum(metrics['epochs'])} epochs in {metrics['train_seconds']:.1f}s, "
+          f"RMSE ${metrics['rmse']:,.2f} (exported: ${metrics['exported_rmse']:,.2f})")
+    if metrics["members"] > 1:
+        print("RMSE of each model: " + ", ".join(f"${rmse:,.2f}" for rmse in metrics["member_rmse"]))
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            json.dump(metrics, f, indent=2)
+
+    if not exported_ok:
+        print(f"Nothing written: the exported weights are up to ${metrics['export_max_difference']:,.2f} from the trained "
+              f"model, more than the tolerance of ${args.tolerance:,.2f}")
+        sys.exit(1)
+    for name, path in metrics["artifacts"].items():
+        print(f"Wrote {path}")
+
+    return None
+
+# program driver
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Program: api.py
+
+Purpose: an HTTP JSON endpoint for salary predictions in bulk, for tools that need many
+         predictions at once rather than one at a time through the prediction page.
+
+         POST /api/predict with a body such as
+            {"inputs": [{"credential": "Diploma", "field": "Engineering", "years": 3},
+                        ["Master's degree", "Education", 5]]}
+         returns
+            {"model_version": "...", "predictions": [61234.56, 83456.78]}
+
+         Inputs use the same values as the prediction page dropdowns. The whole batch is
+         encoded and run through the model in one forward pass.
+"""
+import os
+
+import flask
+import numpy as np
+
+from .encoding import EncodingError
+from .metrics import instrumented
+from . import state
+
+# Largest number of inputs accepted in one request.
+max_batch_size = int(os.environ.get('STUB_ENHANCER_API_MAX_BATCH', '10000'))
+
+"""
+Class: InvalidInput
+
+Purpose: raised when a request cannot be turned into model inputs; answered with a 400.
+"""
+class InvalidInput(ValueError):
+    pass
+
+"""
+Function: parse_inputs()
+
+Purpose: read the (credential, field, years) tuples of a request body. Each input is an
+         object with those keys or a list of the three values.
+
+Parameters:
+    body: the decoded JSON body.
+
+Return:
+    lists of credentials, fields and years.
+"""
+def parse_inputs(body):
+    inputs = body.get('inputs') if isinstance(body, dict) else None
+    if not isinstance(inputs, list):
+        raise InvalidInput('The request body must be an object with an "inputs" list')
+    if len(inputs) > max_batch_size:
+        raise InvalidInput(f'At most {max_batch_size} inputs are accepted per request')
+
+    credentials, fields, years = [], [], []
+    for i, item in enumerate(inputs):
+        if isinstance(item, dict):
+            item = (item.get('credential'), item.get('field'), item.get('years'))
+        if not isinstance(item, (list, tuple)) or len(item) != 3:
+            raise InvalidInput(f'Input {i} must have a credential, a field and years')
+
+        credential, field, year = item
+        if not isinstance(credential, str) or not isinstance(field, str):
+            raise InvalidInput(f'Input {i}: the credential and field must be strings')
+        # JSON booleans are Python ints, and int() would truncate 3.9 to 3
+        if isinstance(year, bool) or not isinstance(year, (int, float)) or not float(year).is_integer():
+            raise InvalidInput(f'Input {i}: years must be a whole number, not {year!r}')
+        year = int(year)
+
+        credentials.append(credential)
+        fields.append(field)
+        years.append(year)
+
+    return credentials, fields, years
+
+"""
+Function: predict_batch()
+
+Purpose: the view of /api/predict.
+
+Return:
+    the JSON response.
+"""
+@instrumented
+def predict_batch():
+    # Use one model and its encoder for the whole batch, even if another is swapped in meanwhile
+    active = state.model_registry.active
+
+    body = flask.request.get_json(silent=True)
+    try:
+        matrix = active.encoder.transform(*parse_inputs(body))
+    except (InvalidInput, EncodingError) as ex:
+        return flask.jsonify(error=str(ex)), 400
+
+    predictions = np.zeros(0)
+    if len(matrix):
+        predictions = active.model.predict(matrix)
+
+    return flask.jsonify(
+        model_version=active.version,
+        predictions=np.round(predictions.astype(float), 2).tolist()
+    )
+
+"""
+Function: register_api()
+
+Purpose: add the prediction API to the Flask server.
+
+Parameters:
+    server: the Flask server behind the Dash app.
+
+Return:
+    None
+"""
+def register_api(server):
+    server.add_url_rule('/api/predict', 'predict_batch', predict_batch, methods=['POST'])
@@ -0,0 +1,430 @@
+"""
+Program: cache.py
+
+Purpose: caching of rendered callback outputs. Outputs are serialized to the same JSON
+         that Dash sends to the browser, so a cached entry can be returned from a callback
+         as-is. The backend is chosen with the STUB_ENHANCER_CACHE environment variable:
+
+            memory  - an LRU inside each worker process (default)
+            file    - one JSON file per entry in STUB_ENHANCER_CACHE_DIR
+            sqlite  - a single SQLite database in STUB_ENHANCER_CACHE_DIR
+            redis   - a Redis (or Redis-compatible) server at STUB_ENHANCER_REDIS_URL
+            none    - no caching
+
+         The file, sqlite and redis backends are shared by every worker and survive
+         restarts; they are fronted by a small per-process LRU. The file and sqlite
+         backends keep at most STUB_ENHANCER_CACHE_MAX_ENTRIES entries, for at most
+         STUB_ENHANCER_CACHE_TTL seconds when it is set, and drop the entries of a callback
+         rendered from an older version of its data once a newer one is in use.
+
+         Outputs rendered ahead of time by prerender() are pinned: kept in the process for
+         as long as it runs, whatever else is cached meanwhile.
+"""
+import collections
+import functools
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+import plotly.io
+
+from .metrics import callback_metrics
+
+# Directory used by the file and sqlite backends.
+cache_dir = os.environ.get('STUB_ENHANCER_CACHE_DIR', os.path.join('.', '.figure_cache'))
+
+# Number of entries kept by each in-process LRU.
+memory_cache_size = int(os.environ.get('STUB_ENHANCER_CACHE_SIZE', '512'))
+
+# Number of entries kept by the file and sqlite backends, and the seconds an entry is served
+# for (0 for as long as it is kept).
+shared_cache_max_entries = int(os.environ.get('STUB_ENHANCER_CACHE_MAX_ENTRIES', '10000'))
+shared_cache_ttl = float(os.environ.get('STUB_ENHANCER_CACHE_TTL', '0'))
+# Writes between two checks of those limits.
+evict_interval = 100
+
+def make_key(namespace, version, args):
+    digest = hashlib.sha1(repr(args).encode('utf-8')).hexdigest()
+    return f'{namespace}:{version}:{digest}'
+
+# The namespace and version of a key made by make_key()
+def split_key(key):
+    namespace, version = key.split(':', 1)
+    return namespace, version.rsplit(':', 1)[0]
+
+# BACKENDS
+# ==============================================================================
+# Every backend stores serialized strings and implements get(key) -> str or None
+# and set(key, value).
+
+"""
+Class: MemoryCache
+
+Purpose: a thread-safe least-recently-used cache held in the current process.
+"""
+class MemoryCache:
+    def __init__(self, maxsize=memory_cache_size):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+"""
+Class: BoundedCache
+
+Purpose: the limits shared by the file and sqlite backends, which would otherwise grow for
+         as long as they are used. Subclasses implement get(key), write(key, value),
+         drop_other_versions(namespace, version) and evict().
+
+         Every version of a callback's data renders different entries, and the data only
+         ever moves forward: the first time a process writes an entry of a new version,
+         the entries of the callback's other versions are dropped. The number and age of
+         the entries are checked every evict_interval writes.
+"""
+class BoundedCache:
+    def __init__(self, max_entries=shared_cache_max_entries, ttl=shared_cache_ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # The versions of each namespace written by this process
+        self.versions = collections.defaultdict(set)
+        self.writes = 0
+        self.lock = threading.Lock()
+
+    # Whether an entry written at the given time is too old to serve
+    def expired(self, written):
+        return self.ttl > 0 and time.time() - written > self.ttl
+
+    def set(self, key, value):
+        namespace, version = split_key(key)
+        with self.lock:
+            new_version = version not in self.versions[namespace]
+            self.versions[namespace].add(version)
+            self.writes += 1
+            check_limits = self.writes % evict_interval == 0
+
+        if new_version:
+            self.drop_other_versions(namespace, version)
+        self.write(key, value)
+        if check_limits:
+            self.evict()
+
+"""
+Class: FileCache
+
+Purpose: keeps one JSON file per entry, in a directory per callback and version of its
+         data. Writes go to a temporary file which is then renamed into place, so
+         concurrent readers in other workers only ever see complete entries.
+"""
+class FileCache(BoundedCache):
+    def __init__(self, directory, **limits):
+        super().__init__(**limits)
+        self.directory = directory
+
+    def _path(self, key):
+        namespace, version = split_key(key)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, namespace, version, f'{digest}.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                if self.expired(os.fstat(f.fileno()).st_mtime):
+                    return None
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, key, value):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except FileNotFoundError:
+            # Its version was dropped by another worker meanwhile
+            pass
+
+    def drop_other_versions(self, namespace, version):
+        try:
+            entries = list(os.scandir(os.path.join(self.directory, namespace)))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.name == version:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                # An entry of the earlier layout, without a version directory
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    # Remove expired entries, then the oldest written beyond max_entries
+    def evict(self):
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except FileNotFoundError:
+                        pass
+
+        entries.sort(reverse=True)
+        for i, (written, path) in enumerate(entries):
+            if i >= self.max_entries or self.expired(written):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+"""
+Class: SQLiteCache
+
+Purpose: stores entries in a single SQLite database. The database runs in WAL mode so
+         that workers can read while another one writes. Connections are not shared
+         between threads, so each thread opens its own.
+"""
+class SQLiteCache(BoundedCache):
+    def __init__(self, path, **limits):
+        super().__init__(**limits)
+        self.path = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        with self._connection() as connection:
+            # The table of the earlier format, without the version and age of its entries
+            connection.execute('DROP TABLE IF EXISTS outputs')
+            connection.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, namespace TEXT NOT NULL, '
+                               'version TEXT NOT NULL, value TEXT NOT NULL, written REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_written ON entries (written)')
+
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute('SELECT value, written FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None or self.expired(row[1]):
+            return None
+        return row[0]
+
+    def write(self, key, value):
+        namespace, version = split_key(key)
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO entries (key, namespace, version, value, written) VALUES (?, ?, ?, ?, ?)',
+                               (key, namespace, version, value, time.time()))
+
+    def drop_other_versions(self, namespace, version):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM entries WHERE namespace = ? AND version != ?', (namespace, version))
+
+    # Remove expired entries, then the oldest written beyond max_entries
+    def evict(self):
+        with self._connection() as connection:
+            if self.ttl > 0:
+                connection.execute('DELETE FROM entries WHERE written < ?', (time.time() - self.ttl,))
+            connection.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY written DESC LIMIT -1 OFFSET ?)',
+                               (self.max_entries,))
+
+"""
+Class: RedisCache
+
+Purpose: stores entries in Redis. Any client object offering get(key) and
+         set(key, value, ex=None) can be passed in, such as a local stand-in; otherwise
+         the redis package is used to connect to the given URL.
+"""
+class RedisCache:
+    def __init__(self, client=None, url='redis://localhost:6379/0', ttl=None, prefix='stubenhancer:'):
+        if client is None:
+            try:
+                import redis
+            except ImportError as ex:
+                raise ImportError('The redis cache backend requires the redis package (pip install redis)') from ex
+            client = redis.Redis.from_url(url)
+
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+"""
+Class: TieredCache
+
+Purpose: fronts a shared backend with an in-process LRU. Entries are immutable (their
+         keys include the data version), so a local copy never goes stale.
+"""
+class TieredCache:
+    def __init__(self, shared, local=None):
+        self.shared = shared
+        self.local = local if local is not None else MemoryCache()
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        self.shared.set(key, value)
+
+"""
+Function: create_cache()
+
+Purpose: build the cache backend named by STUB_ENHANCER_CACHE (or the given name).
+
+Parameters:
+    name: one of 'memory', 'file', 'sqlite', 'redis' or 'none'.
+
+Return:
+    the backend, or None when caching is disabled.
+"""
+def create_cache(name=None):
+    name = (name or os.environ.get('STUB_ENHANCER_CACHE', 'memory')).lower()
+
+    if name == 'none':
+        return None
+    if name == 'memory':
+        return MemoryCache()
+    if name == 'file':
+        return TieredCache(FileCache(cache_dir))
+    if name == 'sqlite':
+        return TieredCache(SQLiteCache(os.path.join(cache_dir, 'outputs.sqlite3')))
+    if name == 'redis':
+        ttl = os.environ.get('STUB_ENHANCER_REDIS_TTL')
+        return TieredCache(RedisCache(
+            url=os.environ.get('STUB_ENHANCER_REDIS_URL', 'redis://localhost:6379/0'),
+            ttl=int(ttl) if ttl else None
+        ))
+
+    raise ValueError(f'Unknown cache backend "{name}"')
+
+# The cache shared by every page.
+output_cache = create_cache()
+
+# Serialized outputs by key, rendered by prerender(). They are looked up before output_cache
+# and never evicted: prerendered outputs are few, and are rendered so they are always served.
+pinned_outputs = {}
+# Set while prerender() runs in this thread, so that cached() pins what it renders
+pinning = threading.local()
+
+# DECORATORS
+# ==============================================================================
+"""
+Function: cached()
+
+Purpose: decorator for callbacks. Outputs are looked up by callback name, data version
+         and input values; on a miss the callback renders as usual and the result is
+         stored.
+
+Parameters:
+    version: identifies the data the outputs are rendered from (see fingerprint.py), or
+             a function returning it, for data that can change while serving.
+    cache: the backend to use, defaults to output_cache.
+    with_context: version is a function returning the version and the data it identifies,
+                  read together; the data is passed to the callback as an extra last
+                  argument, so an output is always rendered from the data its key names,
+                  even if that data is replaced during the call.
+
+Return:
+    the decorator.
+"""
+def cached(version, cache=None, with_context=False):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            if with_context:
+                current_version, context = version()
+                call_args = args + (context,)
+            else:
+                current_version = version() if callable(version) else version
+                call_args = args
+
+            backend = cache if cache is not None else output_cache
+            if backend is None:
+                return func(*call_args)
+
+            key = make_key(func.__name__, current_version, args)
+            pin = getattr(pinning, 'active', False)
+            serialized = pinned_outputs.get(key)
+            if serialized is None:
+                serialized = backend.get(key)
+            callback_metrics.record_cache(func.__name__, serialized is not None)
+            if serialized is not None:
+                if pin:
+                    pinned_outputs[key] = serialized
+                return json.loads(serialized)
+
+            value = func(*call_args)
+            serialized = plotly.io.json.to_json_plotly(value)
+            backend.set(key, serialized)
+            if pin:
+                pinned_outputs[key] = serialized
+            return value
+        return wrapper
+    return decorator
+
+"""
+Function: prerender()
+
+Purpose: render every given input value through each callback and write the results
+         into the cache, pinned (see pinned_outputs) so that they stay cached however many
+         other outputs are cached later.
+
+Parameters:
+    callbacks: the callbacks (wrapped by cached()) to render.
+    values: every input value the callbacks can receive.
+
+Return:
+    the number of entries rendered.
+"""
+def prerender(callbacks, values):
+    count = 0
+    pinning.active = True
+    try:
+        for func in callbacks:
+            for value in values:
+                func(value)
+                count += 1
+    finally:
+        pinning.active = False
+    return count
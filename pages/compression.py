@@ -0,0 +1,118 @@
+"""
+Program: compression.py
+
+Purpose: compresses the responses of the Flask server. Callback responses (Plotly figure
+         JSON, the network graph's elements) and Dash's JavaScript bundles are large and
+         compress several-fold, so every response bigger than a threshold is sent gzip
+         compressed, or brotli compressed when the brotli package is installed and the
+         browser accepts it.
+
+         Most bodies are sent over and over: the JavaScript bundles, and the callback outputs
+         served from the output cache. Compressed bodies are kept in a small in-memory cache
+         keyed by a digest of the body, so each one is only compressed once per process.
+
+            STUB_ENHANCER_COMPRESS             encodings to use, in order of preference
+                                               (default "br,gzip"); "none" turns it off
+            STUB_ENHANCER_COMPRESS_MIN_SIZE    smallest body compressed, in bytes (default 1024)
+            STUB_ENHANCER_COMPRESS_LEVEL       gzip level, 1-9 (default 6)
+            STUB_ENHANCER_COMPRESS_CACHE_SIZE  compressed bodies kept (default 256)
+"""
+import gzip
+import hashlib
+import os
+
+import flask
+
+from .cache import MemoryCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+encodings = [encoding.strip() for encoding in os.environ.get('STUB_ENHANCER_COMPRESS', 'br,gzip').split(',') if encoding.strip()]
+min_size = int(os.environ.get('STUB_ENHANCER_COMPRESS_MIN_SIZE', '1024'))
+gzip_level = int(os.environ.get('STUB_ENHANCER_COMPRESS_LEVEL', '6'))
+compressed_cache_size = int(os.environ.get('STUB_ENHANCER_COMPRESS_CACHE_SIZE', '256'))
+
+# Brotli quality; 5 compresses better than gzip at about the same speed.
+brotli_quality = 5
+
+# Media types worth compressing; images and fonts already are.
+compressible_types = ('text/', 'application/json', 'application/javascript', 'application/x-javascript', 'image/svg+xml')
+
+compressors = {
+    'gzip': lambda data: gzip.compress(data, compresslevel=gzip_level, mtime=0),
+}
+if brotli is not None:
+    compressors['br'] = lambda data: brotli.compress(data, quality=brotli_quality)
+
+# Compressed bodies, keyed by encoding and digest of the uncompressed body
+compressed_bodies = MemoryCache(compressed_cache_size)
+
+"""
+Function: compress()
+
+Purpose: compress a body, reusing the result for a body compressed before.
+
+Parameters:
+    data: the body.
+    encoding: "gzip" or "br".
+
+Return:
+    the compressed body.
+"""
+def compress(data, encoding):
+    key = (encoding, hashlib.sha1(data).digest())
+    compressed = compressed_bodies.get(key)
+    if compressed is None:
+        compressed = compressors[encoding](data)
+        compressed_bodies.set(key, compressed)
+    return compressed
+
+# The encoding to send a response in, or None to send it as it is
+def choose_encoding(response):
+    if response.direct_passthrough or response.is_streamed:
+        return None
+    if response.status_code < 200 or response.status_code >= 300 or response.status_code == 204:
+        return None
+    if 'Content-Encoding' in response.headers or not response.mimetype.startswith(compressible_types):
+        return None
+    if (response.content_length or 0) < min_size:
+        return None
+
+    available = [encoding for encoding in encodings if encoding in compressors]
+    if not available:
+        return None
+    return flask.request.accept_encodings.best_match(available)
+
+"""
+Function: register_compression()
+
+Purpose: compress the responses of the Flask server.
+
+Parameters:
+    server: the Flask server behind the Dash app.
+
+Return:
+    None
+"""
+def register_compression(server):
+    if not any(encoding in compressors for encoding in encodings):
+        return
+
+    @server.after_request
+    def compress_response(response):
+        encoding = choose_encoding(response)
+
+        # Responses vary with Accept-Encoding whenever they could have been compressed
+        if response.mimetype.startswith(compressible_types):
+            response.vary.add('Accept-Encoding')
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        flask.g.uncompressed_size = len(data)
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
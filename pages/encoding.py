@@ -0,0 +1,52 @@
+"""
+Program: encoding.py
+
+Purpose: the encoding of the salary model's inputs. Each model is served with the encoder
+         it was trained with (see registry.py), and the prediction page, the prediction API
+         and the model export all encode through that encoder's transform(), so inputs are
+         encoded at serving time exactly as they were in training.
+
+         The encoder is fitted by machine_learning/train.py and saved in the exported model
+         file. Models saved without one, such as Keras .h5 files, are served with the
+         encoder in encoder_path.
+
+         Input matrix columns: [yrs, field, bach, cert, dip, doc, mast, prof]
+"""
+import itertools
+import os
+
+import numpy as np
+
+# EncodingError is raised by TargetEncoder.transform(), and imported from here by its callers
+from .target_encoding import EncodingError  # noqa: F401
+
+# The encoder of the served model when its file holds none, written by the training script.
+encoder_path = os.environ.get('STUB_ENHANCER_ENCODER', os.path.join('.', 'Salary_Encoder.npz'))
+
+"""
+Function: grid()
+
+Purpose: every combination of the given credentials, fields and years, as the arrays that
+         an encoder's transform() takes. Any argument left out means every value the
+         encoder knows.
+
+Parameters:
+    encoder: the encoder.
+    credentials: the credentials to include.
+    fields: the fields of study to include.
+    years: the years of experience to include.
+
+Return:
+    arrays of the credentials, fields and years of each combination, with years varying
+    fastest, then fields, then credentials.
+"""
+def grid(encoder, credentials=None, fields=None, years=None):
+    credentials = list(encoder.credential_index) if credentials is None else credentials
+    fields = list(encoder.field_index) if fields is None else fields
+    years = [int(year) for year in encoder.year_index] if years is None else years
+
+    combinations = list(itertools.product(credentials, fields, years))
+    if not combinations:
+        return np.array([], dtype=object), np.array([], dtype=object), np.array([], dtype=int)
+    credential_values, field_values, year_values = zip(*combinations)
+    return np.array(credential_values, dtype=object), np.array(field_values, dtype=object), np.array(year_values)
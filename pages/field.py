@@ -1,4 +1,8 @@
 from .shared import generate_header, generate_navbar
+from .metrics import instrumented
+from .cache import cached, prerender
+from .figures import by_credential, bar_figure, credential_colors
+from . import state
 
 import dash
 import dash_bootstrap_components as dbc
@@ -23,13 +27,17 @@ list = dflist.to_numpy()
 list = np.unique(list)
 '''
 
-derived_df = pd.read_csv('./derived_data.csv')
+state.initialize()
+derived_df = state.derived_df
 
 dflist = derived_df[derived_df['Field of Study (CIP code)'].str.contains('[0-9]{2}.[0-9]{2}', regex=True) == False]
 dflist = dflist[dflist['Field of Study (CIP code)'].str.contains('00. Total') == False] #dflist = dflist[dflist['Field of Study (CIP code)'] != '00. Total']
 dflist = dflist.loc[:,'Field of Study (CIP code)']
 list = np.unique(dflist.to_numpy())
 
+# Rendered outputs are cached per version of the dataset
+data_version = state.data_version
+
 # -------------------------------------------------------------------------------------------------------------
 
 
@@ -120,6 +128,8 @@ def df_avg_salary_smooth_sum(dataframe, years):
     Output(component_id='FoS-Salary-Text', component_property='children'),
     Input(component_id='FoS', component_property='value')
 )
+@instrumented
+@cached(data_version)
 def update_fos_salary_text(field_of_study):
     if not field_of_study:
         return 'Select a Field of Study for an Average Salary...'
@@ -154,6 +164,8 @@ def update_fos_salary_text(field_of_study):
     Output(component_id='FoS-Yearly-Salary-Linechart', component_property='children'),
     Input(component_id='FoS', component_property='value')
 )
+@instrumented
+@cached(data_version)
 def update_fos_salary_linechart(field_of_study):
     # https://plotly.com/python/reference/layout/
     layout = go.Layout(
@@ -254,6 +266,8 @@ def update_fos_salary_linechart(field_of_study):
     Output(component_id='FoS-Certification-Graph', component_property='children'),
     Input(component_id='FoS', component_property='value')
 )
+@instrumented
+@cached(data_version)
 def update_fos_certification_graph(field_of_study):
     layout = go.Layout(
         margin=go.layout.Margin(
@@ -267,18 +281,16 @@ def update_fos_certification_graph(field_of_study):
         title='Mean Incomes by Certification Type for the Chosen Field (2005-2014)',
         xaxis_title="Credential",
         yaxis_title="Mean Income (CAD)",
+        yaxis_tickprefix='$',
+        yaxis_gridcolor='#666666',
         bargap=0,
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color="white"),
-    )
-
-    figure = go.Figure(
-        layout=layout
+        font=dict(color="white", size=14),
     )
 
     if not field_of_study:
-        return dcc.Graph(figure=figure, config={'displayModeBar': False})
+        return dcc.Graph(figure=go.Figure(layout=layout), config={'displayModeBar': False})
 
     fos_split = field_of_study.split('. ')
     fos_code = fos_split[0]
@@ -305,48 +317,19 @@ def update_fos_certification_graph(field_of_study):
             income_year_column = f'Average Income {years}'
             break
 
-    # The map of colors for each type of credential
-    # NOTE: The credential types will be pulled in the order specified within the list.
-    color_map = {
-        'Certificate': '#D6E353',
-        'Diploma': '#F7971D',
-        'Bachelor\'s degree': '#F692E7',
-        'Professional bachelor\'s degree': '#FF7B7B',
-        'Bachelor\'s degree + certificate/diploma': '#3BA5EA',
-        'Master\'s degree': '#733BEA',
-        'Doctoral Degree': '#3BEA90',
-    }
-
-    # Add each bar by certification type
-    for certificate_name in color_map:
-        # Get the new dataframe for this specific bar (by its credential name)
-        bar_df = df2[df2["Credential"] == certificate_name]
-
-        # Ignore this bar if there are no entries in the new dataframe
-        if bar_df.empty: continue
-        if bar_df[income_year_column].isnull().values.any(): continue
-
-        # Construct the new bar trace
-        new_trace = go.Bar(
-            x=bar_df["Credential"],
-            y=bar_df[income_year_column], # y=bar_df["Median Income"],
-            text = bar_df[income_year_column],
-            textposition="inside",
-            marker=dict(color='#024B7A'),
-            marker_line=dict(width=1, color='black'),
-            marker_color=color_map[certificate_name],
-            width=0.5,
-            hovertemplate='<extra></extra><br>Credential: %{x} <br>Average Median Income: %{y}',
-            name=certificate_name
-        )
-
-        # Add the new bar trace into the overall figure
-        figure.add_traces(new_trace)
-        figure.update_yaxes(gridcolor='#666666')
-        figure.update_layout(yaxis_tickprefix = '$',
-                        font=dict(
-                            size=14
-                        ))
+    # One bar per credential with an income, in the order of credential_colors
+    bar_df = by_credential(df2, income_year_column)
+
+    figure = bar_figure(
+        layout,
+        bar_df["Credential"],
+        bar_df[income_year_column], # bar_df["Median Income"],
+        bar_df["Credential"].map(credential_colors),
+        text=bar_df[income_year_column],
+        width=0.5,
+        hovertemplate='<extra></extra><br>Credential: %{x} <br>Average Median Income: %{y}',
+        legend={credential: credential_colors[credential] for credential in bar_df["Credential"]},
+    )
 
     barChart = dcc.Graph(
         figure=figure,
@@ -355,4 +338,10 @@ def update_fos_certification_graph(field_of_study):
 
     return barChart
 
-# --------------------------------------------------------------------------------------------------------------------------------------
\ No newline at end of file
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+# Render every output of this page for every option of the FoS dropdown into the output cache.
+# The option list is fixed by derived_data.csv, so after this runs the page is served purely from the cache.
+def prerender_field_outputs():
+    callbacks = [update_fos_salary_text, update_fos_salary_linechart, update_fos_certification_graph]
+    return prerender(callbacks, [None] + [str(fos) for fos in list])
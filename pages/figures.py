@@ -0,0 +1,97 @@
+"""
+Program: figures.py
+
+Purpose: helpers for building the Plotly figures of the pages compactly. Every figure is
+         sent to the browser as JSON on each callback, so what it repeats matters:
+
+            - Plotly embeds its whole default template in every figure, with defaults for
+              every trace type (about 7 KB, more than most of the figures' data). The
+              template registered here as template_name is the same template with only the
+              trace types the pages draw. app.py makes it the default before the pages are
+              imported; importing this module does not change Plotly's default.
+            - Bar charts with a bar per credential were built as one trace per bar, each
+              repeating the same outline, width, text position and hover text, with the
+              layout updated again for every bar. bar_figure() draws them as a single trace
+              with a color per bar, and applies the layout once.
+"""
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# The color of each credential.
+# NOTE: Bars by credential are drawn in the order of this map.
+credential_colors = {
+    'Certificate': '#D6E353',
+    'Diploma': '#F7971D',
+    'Bachelor\'s degree': '#F692E7',
+    'Professional bachelor\'s degree': '#FF7B7B',
+    'Bachelor\'s degree + certificate/diploma': '#3BA5EA',
+    'Master\'s degree': '#733BEA',
+    'Doctoral Degree': '#3BEA90',
+}
+
+# Trace types drawn by the pages; the template keeps the defaults of these only
+trace_types = ('bar', 'scatter')
+
+template_name = 'stubenhancer'
+pio.templates[template_name] = go.layout.Template(
+    layout=pio.templates['plotly'].layout,
+    data={trace_type: pio.templates['plotly'].data[trace_type] for trace_type in trace_types},
+)
+
+"""
+Function: by_credential()
+
+Purpose: the rows of a dataframe with a credential of credential_colors and a value, in
+         the order of credential_colors.
+
+Parameters:
+    dataframe: a dataframe with a Credential column.
+    value_column: the column that must have a value.
+
+Return:
+    the selected rows.
+"""
+def by_credential(dataframe, value_column):
+    order = {credential: i for i, credential in enumerate(credential_colors)}
+    dataframe = dataframe.loc[dataframe['Credential'].isin(order)].dropna(subset=[value_column])
+    return dataframe.sort_values('Credential', key=lambda credentials: credentials.map(order), kind='stable')
+
+"""
+Function: bar_figure()
+
+Purpose: a bar chart drawn as a single trace, with a color per bar.
+
+Parameters:
+    layout: the layout of the figure, applied once.
+    categories: the label of each bar.
+    values: the value of each bar.
+    colors: the color of each bar.
+    orientation: 'v' for vertical bars, 'h' for horizontal bars.
+    legend: a dict of legend entries to show, a color by name, or None for no legend.
+    **trace: further properties of the trace shared by every bar, such as text,
+             texttemplate, width and hovertemplate.
+
+Return:
+    the figure.
+"""
+def bar_figure(layout, categories, values, colors, orientation='v', legend=None, **trace):
+    x, y = (categories, values) if orientation == 'v' else (values, categories)
+    traces = [go.Bar(
+        x=x,
+        y=y,
+        orientation=orientation,
+        marker=dict(color=list(colors), line=dict(width=1, color='black')),
+        textposition='inside',
+        showlegend=False,
+        **trace
+    )]
+
+    # Entries without bars, for the legend only
+    if legend:
+        traces += [go.Bar(x=[None], y=[None], name=name, marker_color=color) for name, color in legend.items()]
+
+    figure = go.Figure(data=traces, layout=layout)
+    if legend:
+        # Overlaid, the bars are not pushed aside by the legend entries as they would be grouped
+        figure.layout.barmode = 'overlay'
+    return figure
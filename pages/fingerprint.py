@@ -0,0 +1,28 @@
+"""
+Program: fingerprint.py
+
+Purpose: versions of the files the app and the training scripts depend on. Cached outputs
+         (see cache.py), served models (see registry.py) and prepared training features
+         (see machine_learning/salary_model.py) are keyed on the fingerprints of the files
+         they come from, so they are never used after those files change.
+
+         Imports nothing beyond the standard library, so the training scripts can use it
+         without loading the app.
+"""
+import hashlib
+
+"""
+Function: file_fingerprint()
+
+Purpose: hash the contents of a file, so that anything derived from an older version of
+         it is never used after the file changes.
+
+Parameters:
+    path: path of the file to hash.
+
+Return:
+    a short hex digest of the file contents.
+"""
+def file_fingerprint(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
@@ -7,8 +7,12 @@ import plotly.graph_objects as go
 import plotly.express as px
 
 from .shared import generate_navbar
+from .figures import by_credential, bar_figure, credential_colors
+from . import state
+from .profiling import startup
 
-derived_df = pd.read_csv('./derived_data.csv')
+state.initialize()
+derived_df = state.derived_df
 
 dash.register_page(__name__, path='/')
 
@@ -137,65 +141,36 @@ def certification_salaries_barchart():
         title='Mean Incomes by Certification Type (2005-2014)',
         xaxis_title="Mean Income (CAD)", #xaxis_title="Credential",
         yaxis_title="Credential", # yaxis_title="Mean Income (CAD)",
+        xaxis_tickprefix='$',
+        xaxis_gridcolor='#666666',
         bargap=0,
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color="white"),
+        font=dict(color="white", size=14),
         yaxis_showticklabels=False
     )
 
-    figure = go.Figure(
-        layout=layout
-    )
-
     dataframe = derived_df.loc[derived_df['Field of Study (CIP code)'].str.contains(
         '00. Total')]
     dataframe = dataframe.loc[dataframe['Credential']
                               != 'Overall (All Graduates)']
     dataframe = dataframe.reset_index()
 
-    # The map of colors for each type of credential
-    # NOTE: The credential types will be pulled in the order specified within the list.
-    color_map = {
-        'Certificate': '#D6E353',
-        'Diploma': '#F7971D',
-        'Bachelor\'s degree': '#F692E7',
-        'Professional bachelor\'s degree': '#FF7B7B',
-        'Bachelor\'s degree + certificate/diploma': '#3BA5EA',
-        'Master\'s degree': '#733BEA',
-        'Doctoral Degree': '#3BEA90',
-    }
-
-    # Add each bar by certification type
-    for certificate_name in color_map:
-        # Get the new dataframe for this specific bar (by its credential name)
-        bar_df = dataframe[dataframe["Credential"] == certificate_name]
-
-        # Construct the new bar trace
-        new_trace = go.Bar(
-            x=bar_df['Average Income Ten Years After Graduation'], # x=bar_df["Credential"],
-            y=bar_df["Credential"], # y=bar_df['Average Income Ten Years After Graduation'],
-            text=bar_df['Average Income Ten Years After Graduation'],
-            textposition="inside",
-            texttemplate='%{y} %{x}',
-            orientation='h', #orientation='v',
-            #textangle=-90,
-            marker=dict(color='#024B7A'),
-            marker_line=dict(width=1, color='black'),
-            marker_color=color_map[certificate_name],
-            width=0.85,
-            hovertemplate='<extra></extra><br>Credential: %{x} <br>Average Median Income: %{y}',
-            name=certificate_name,
-            showlegend=False
-        )
-
-        # Add the new bar trace into the overall figure
-        figure.add_traces(new_trace)
-        figure.update_xaxes(gridcolor='#666666')
-        figure.update_layout(xaxis_tickprefix = '$',
-                        font=dict(
-                            size=14
-                        ))
+    # One bar per credential, in the order of credential_colors
+    bar_df = by_credential(dataframe, 'Average Income Ten Years After Graduation')
+
+    figure = bar_figure(
+        layout,
+        bar_df["Credential"],
+        bar_df['Average Income Ten Years After Graduation'],
+        bar_df["Credential"].map(credential_colors),
+        orientation='h', #orientation='v',
+        text=bar_df['Average Income Ten Years After Graduation'],
+        texttemplate='%{y} %{x}',
+        #textangle=-90,
+        width=0.85,
+        hovertemplate='<extra></extra><br>Credential: %{x} <br>Average Median Income: %{y}',
+    )
 
     barChart = dcc.Graph(
         figure=figure,
@@ -300,6 +275,13 @@ def top_vs_bottom_5_barchart():
 
 # -------------------------------------------------------------------------------------------------------------
 
+# Build the figures once, when the page is loaded
+with startup.step('figure build: happiness scatterplot'):
+    happiness_scatterplot = jobs_happiness_scatterplot()
+with startup.step('figure build: certification barchart'):
+    certification_barchart = certification_salaries_barchart()
+with startup.step('figure build: top vs bottom 5 barchart'):
+    top_vs_bottom_barchart = top_vs_bottom_5_barchart()
 
 layout = html.Div(className="body", children=[
     generate_navbar(__name__),
@@ -333,13 +315,13 @@ layout = html.Div(className="body", children=[
         ]),
         html.Div(className="home-two", children=[
             dbc.Tabs([
-                dbc.Tab(jobs_happiness_scatterplot(),
+                dbc.Tab(happiness_scatterplot,
                         label="Happiness Threshold",
                         label_style={"color": "#D84FD2"}),
-                dbc.Tab(certification_salaries_barchart(),
+                dbc.Tab(certification_barchart,
                         label="Certification",
                         label_style={"color": "#D84FD2"}),
-                dbc.Tab(top_vs_bottom_5_barchart(),
+                dbc.Tab(top_vs_bottom_barchart,
                         label="Top 5 vs Bottom 5",
                         label_style={"color": "#D84FD2"}),
             ], )
@@ -0,0 +1,233 @@
+"""
+Program: metrics.py
+
+Purpose: per-callback instrumentation. Callbacks wrapped with instrumented() record their
+         call count, errors and latency; the size of each serialized callback response (and
+         of what was sent, when compressed, see compression.py) and the output cache hits and
+         misses (see cache.py) are recorded as well. Everything is exposed at /metrics in the
+         Prometheus text format.
+
+         Metrics are kept per process. Under gunicorn each scrape of /metrics is answered
+         by one worker, so scrape each worker or sum across scrapes by the pid label.
+"""
+import bisect
+import collections
+import functools
+import math
+import os
+import threading
+import time
+
+import flask
+
+# Upper bounds of the latency histogram buckets, in seconds.
+latency_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Upper bounds of the response size histogram buckets, in bytes.
+size_buckets = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+# Quantiles reported over the most recent calls of each callback.
+quantiles = (0.5, 0.95, 0.99)
+recent_calls = 1024
+
+"""
+Class: Histogram
+
+Purpose: cumulative bucket counts plus a sum, as Prometheus histograms are reported.
+"""
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+"""
+Class: CallbackStats
+
+Purpose: everything recorded for one callback.
+"""
+class CallbackStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(latency_buckets)
+        self.recent_latencies = collections.deque(maxlen=recent_calls)
+        self.response_size = Histogram(size_buckets)
+        self.sent_size = Histogram(size_buckets)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def latency_quantile(self, quantile):
+        ordered = sorted(self.recent_latencies)
+        if not ordered:
+            return 'NaN'
+        return ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+
+"""
+Class: CallbackMetrics
+
+Purpose: thread-safe registry of the stats of every callback.
+"""
+class CallbackMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = collections.defaultdict(CallbackStats)
+
+    def record_call(self, name, seconds, failed):
+        with self.lock:
+            stats = self.stats[name]
+            stats.calls += 1
+            stats.errors += int(failed)
+            stats.latency.observe(seconds)
+            stats.recent_latencies.append(seconds)
+
+    def record_response_size(self, name, size, sent_size=None):
+        with self.lock:
+            self.stats[name].response_size.observe(size)
+            self.stats[name].sent_size.observe(size if sent_size is None else sent_size)
+
+    def record_cache(self, name, hit):
+        with self.lock:
+            if hit:
+                self.stats[name].cache_hits += 1
+            else:
+                self.stats[name].cache_misses += 1
+
+    def render(self):
+        pid = os.getpid()
+        lines = []
+
+        def metric(name, metric_type, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+
+        with self.lock:
+            stats = sorted(self.stats.items())
+
+            metric('stubenhancer_callback_calls_total', 'counter', 'Calls of each Dash callback.')
+            for name, s in stats:
+                lines.append(f'stubenhancer_callback_calls_total{{callback="{name}",pid="{pid}"}} {s.calls}')
+
+            metric('stubenhancer_callback_errors_total', 'counter', 'Calls of each Dash callback that raised.')
+            for name, s in stats:
+                lines.append(f'stubenhancer_callback_errors_total{{callback="{name}",pid="{pid}"}} {s.errors}')
+
+            metric('stubenhancer_callback_latency_seconds', 'histogram', 'Time spent in each Dash callback.')
+            for name, s in stats:
+                for bound, count in s.latency.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'stubenhancer_callback_latency_seconds_bucket{{callback="{name}",pid="{pid}",le="{le}"}} {count}')
+                lines.append(f'stubenhancer_callback_latency_seconds_sum{{callback="{name}",pid="{pid}"}} {s.latency.sum}')
+                lines.append(f'stubenhancer_callback_latency_seconds_count{{callback="{name}",pid="{pid}"}} {s.latency.count}')
+
+            metric('stubenhancer_callback_recent_latency_seconds', 'summary', f'Latency quantiles over the last {recent_calls} calls of each Dash callback.')
+            for name, s in stats:
+                for quantile in quantiles:
+                    lines.append(f'stubenhancer_callback_recent_latency_seconds{{callback="{name}",pid="{pid}",quantile="{quantile}"}} {s.latency_quantile(quantile)}')
+                lines.append(f'stubenhancer_callback_recent_latency_seconds_sum{{callback="{name}",pid="{pid}"}} {sum(s.recent_latencies)}')
+                lines.append(f'stubenhancer_callback_recent_latency_seconds_count{{callback="{name}",pid="{pid}"}} {len(s.recent_latencies)}')
+
+            metric('stubenhancer_callback_response_bytes', 'histogram', 'Size of the serialized response of each Dash callback.')
+            for name, s in stats:
+                for bound, count in s.response_size.cumulative():
+                    le = '+Inf' if bound == float('inf') else str(bound)
+                    lines.append(f'stubenhancer_callback_response_bytes_bucket{{callback="{name}",pid="{pid}",le="{le}"}} {count}')
+                lines.append(f'stubenhancer_callback_response_bytes_sum{{callback="{name}",pid="{pid}"}} {int(s.response_size.sum)}')
+                lines.append(f'stubenhancer_callback_response_bytes_count{{callback="{name}",pid="{pid}"}} {s.response_size.count}')
+
+            metric('stubenhancer_callback_sent_bytes', 'histogram', 'Size of the response of each Dash callback as sent, after compression.')
+            for name, s in stats:
+                for bound, count in s.sent_size.cumulative():
+                    le = '+Inf' if bound == float('inf') else str(bound)
+                    lines.append(f'stubenhancer_callback_sent_bytes_bucket{{callback="{name}",pid="{pid}",le="{le}"}} {count}')
+                lines.append(f'stubenhancer_callback_sent_bytes_sum{{callback="{name}",pid="{pid}"}} {int(s.sent_size.sum)}')
+                lines.append(f'stubenhancer_callback_sent_bytes_count{{callback="{name}",pid="{pid}"}} {s.sent_size.count}')
+
+            metric('stubenhancer_callback_cache_hits_total', 'counter', 'Output cache hits of each Dash callback.')
+            for name, s in stats:
+                lines.append(f'stubenhancer_callback_cache_hits_total{{callback="{name}",pid="{pid}"}} {s.cache_hits}')
+
+            metric('stubenhancer_callback_cache_misses_total', 'counter', 'Output cache misses of each Dash callback.')
+            for name, s in stats:
+                lines.append(f'stubenhancer_callback_cache_misses_total{{callback="{name}",pid="{pid}"}} {s.cache_misses}')
+
+            metric('stubenhancer_callback_cache_hit_ratio', 'gauge', 'Share of calls of each Dash callback answered from the output cache.')
+            for name, s in stats:
+                lookups = s.cache_hits + s.cache_misses
+                ratio = s.cache_hits / lookups if lookups else 'NaN'
+                lines.append(f'stubenhancer_callback_cache_hit_ratio{{callback="{name}",pid="{pid}"}} {ratio}')
+
+        return '\n'.join(lines) + '\n'
+
+# The metrics of every callback in this process.
+callback_metrics = CallbackMetrics()
+
+"""
+Function: instrumented()
+
+Purpose: decorator recording the latency of each call of a callback. It also tags the
+         current request with the callback name, so the size of the response can be
+         attributed to it once serialized (see register_metrics()).
+
+Parameters:
+    func: the callback.
+
+Return:
+    the wrapped callback.
+"""
+def instrumented(func):
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if flask.has_request_context():
+            flask.g.callback_name = name
+
+        start = time.perf_counter()
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            callback_metrics.record_call(name, time.perf_counter() - start, failed)
+
+    return wrapper
+
+"""
+Function: register_metrics()
+
+Purpose: add the /metrics endpoint to the Flask server, and record the size of every
+         callback response it sends.
+
+Parameters:
+    server: the Flask server behind the Dash app.
+
+Return:
+    None
+"""
+def register_metrics(server):
+    @server.after_request
+    def record_response_size(response):
+        name = flask.g.get('callback_name')
+        if name is not None and not response.direct_passthrough:
+            sent_size = response.content_length or len(response.get_data())
+            # compression.py notes the size before compressing; its hook runs before this one
+            callback_metrics.record_response_size(name, flask.g.get('uncompressed_size', sent_size), sent_size)
+        return response
+
+    def metrics_view():
+        return flask.Response(callback_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    server.add_url_rule('/metrics', 'metrics', metrics_view)
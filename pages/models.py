@@ -0,0 +1,352 @@
+"""
+Program: models.py
+
+Purpose: the salary model as it is served. The Keras model can be exported to a compact
+         .npz file of its weights, stored as float16 or as int8 with a scale per output
+         column, and evaluated with NumPy alone. Loading that file is practically free and
+         does not import TensorFlow at all; a Keras .h5 file is still accepted, and wrapped
+         to offer the same interface.
+
+         Every model offers predict(matrix), taking the (n x 8) input matrix built by the
+         encoder of its inputs (see target_encoding.py) and returning n predicted salaries.
+         An exported .npz file holds that encoder too, so the model and the encoder it was
+         trained with are deployed, versioned and swapped in as one file (see registry.py).
+
+         Several exported models of the same shape, such as the same network trained with
+         different seeds, can be served together as an ensemble: their weights are stacked
+         into one array per layer and evaluated together, and its prediction is their mean.
+
+Usage (from the repository root, TensorFlow required):
+    python -m pages.models --precision float16 --output Salary_Model.npz
+    python -m pages.models --model seed_0.h5 seed_1.h5 seed_2.h5 --output Salary_Ensemble.npz
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from .target_encoding import TargetEncoder
+
+# Precisions weights can be stored in.
+precisions = ('float32', 'float16', 'int8')
+
+# Default largest difference from the float32 Keras model accepted on export, in dollars.
+# float16 weights stay within about $10 and int8 weights within about $150, against a
+# model RMSE of about $11,000.
+default_tolerance = 250.0
+
+# Prefix of the encoder's arrays in an exported model file.
+encoder_prefix = 'encoder_'
+
+activations = {
+    'relu': lambda values: np.maximum(values, 0),
+    'linear': lambda values: values,
+}
+
+"""
+Class: NumpyModel
+
+Purpose: a stack of dense layers evaluated with NumPy. Weights stay in their stored
+         precision in memory and are expanded to float32 as they are used, so many models
+         can be held at once.
+"""
+class NumpyModel:
+    def __init__(self, weights, biases, layer_activations, scales=None, precision='float32'):
+        for activation in layer_activations:
+            if activation not in activations:
+                raise ValueError(f'Unsupported activation "{activation}"')
+
+        self.weights = weights
+        self.biases = biases
+        self.activations = list(layer_activations)
+        self.scales = scales
+        self.precision = precision
+
+    # The float32 weight matrix of each layer
+    def layer_weights(self):
+        for i, weights in enumerate(self.weights):
+            weights = weights.astype(np.float32)
+            if self.scales is not None:
+                # One scale per output column (of each member, for an ensemble)
+                weights *= np.expand_dims(self.scales[i], -2)
+            yield weights
+
+    def layer_biases(self):
+        for biases in self.biases:
+            yield biases.astype(np.float32)
+
+    # The float32 weights, biases and activation of each layer
+    def dense_layers(self):
+        return list(zip(self.layer_weights(), self.layer_biases(), self.activations))
+
+    def predict(self, matrix):
+        values = np.asarray(matrix, dtype=np.float32)
+        for weights, biases, activation in zip(self.layer_weights(), self.layer_biases(), self.activations):
+            values = activations[activation](values @ weights + biases)
+        return values[:, 0]
+
+    """
+    Function: from_keras()
+
+    Purpose: copy the weights of a Keras model made of dense layers.
+
+    Parameters:
+        model: the Keras model.
+        precision: one of 'float32', 'float16' or 'int8'.
+
+    Return:
+        the NumpyModel.
+    """
+    @classmethod
+    def from_keras(cls, model, precision='float32'):
+        if precision not in precisions:
+            raise ValueError(f'Unknown precision "{precision}", expected one of {", ".join(precisions)}')
+
+        weights, biases, layer_activations, scales = [], [], [], []
+        for layer in model.layers:
+            layer_weights, layer_biases = (np.asarray(array, dtype=np.float32) for array in layer.get_weights())
+            layer_activations.append(layer.get_config()['activation'])
+
+            if precision == 'int8':
+                # Symmetric quantization, one scale per output column
+                scale = np.abs(layer_weights).max(axis=0) / 127
+                scale[scale == 0] = 1
+                weights.append(np.round(layer_weights / scale).astype(np.int8))
+                scales.append(scale.astype(np.float32))
+                biases.append(layer_biases)
+            else:
+                weights.append(layer_weights.astype(precision))
+                biases.append(layer_biases.astype(precision))
+
+        return cls(weights, biases, layer_activations, scales if precision == 'int8' else None, precision)
+
+    # Saved with the encoder of its inputs when one is given (see load_encoder())
+    def save(self, path, encoder=None):
+        arrays = {'precision': np.array(self.precision), 'activations': np.array(self.activations)}
+        for i, (weights, biases) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'weights_{i}'] = weights
+            arrays[f'biases_{i}'] = biases
+            if self.scales is not None:
+                arrays[f'scales_{i}'] = self.scales[i]
+        if encoder is not None:
+            arrays.update({encoder_prefix + name: array for name, array in encoder.arrays().items()})
+        np.savez_compressed(path, **arrays)
+
+    # Loads an EnsembleModel when the file holds stacked weights
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            layer_activations = [str(activation) for activation in arrays['activations']]
+            layers = range(len(layer_activations))
+            weights = [arrays[f'weights_{i}'] for i in layers]
+            biases = [arrays[f'biases_{i}'] for i in layers]
+            scales = [arrays[f'scales_{i}'] for i in layers] if 'scales_0' in arrays else None
+            model_class = EnsembleModel if weights[0].ndim == 3 else cls
+            return model_class(weights, biases, layer_activations, scales, str(arrays['precision']))
+
+"""
+Class: EnsembleModel
+
+Purpose: several NumpyModels of the same shape and precision served as one. Each layer's
+         weights are stacked into a (models x inputs x outputs) array, so one batched matrix
+         product per layer evaluates every member at once; for the small layers of the
+         salary model this costs little more than a single model.
+"""
+class EnsembleModel(NumpyModel):
+    @property
+    def members(self):
+        return self.weights[0].shape[0]
+
+    """
+    Function: from_models()
+
+    Purpose: stack models into an ensemble.
+
+    Parameters:
+        models: NumpyModels with the same layer shapes, activations and precision.
+
+    Return:
+        the EnsembleModel.
+    """
+    @classmethod
+    def from_models(cls, models):
+        first = models[0]
+        for model in models[1:]:
+            if (model.activations != first.activations or model.precision != first.precision
+                    or [weights.shape for weights in model.weights] != [weights.shape for weights in first.weights]):
+                raise ValueError('The models of an ensemble must have the same layers and precision')
+
+        layers = range(len(first.weights))
+        weights = [np.stack([model.weights[i] for model in models]) for i in layers]
+        biases = [np.stack([model.biases[i] for model in models]) for i in layers]
+        scales = [np.stack([model.scales[i] for model in models]) for i in layers] if first.scales is not None else None
+        return cls(weights, biases, first.activations, scales, first.precision)
+
+    # The network graph draws a single network; it shows the first member
+    def dense_layers(self):
+        return [(weights[0], biases[0], activation) for weights, biases, activation in super().dense_layers()]
+
+    # The prediction of every member, a (members x n) array
+    def predict_members(self, matrix):
+        values = np.asarray(matrix, dtype=np.float32)
+        for weights, biases, activation in zip(self.layer_weights(), self.layer_biases(), self.activations):
+            # (n x inputs) for the first layer, then (members x n x inputs), times (members x inputs x outputs)
+            values = activations[activation](np.matmul(values, weights) + biases[:, np.newaxis, :])
+        return values[:, :, 0]
+
+    def predict(self, matrix):
+        return self.predict_members(matrix).mean(axis=0)
+
+    # The members' mean prediction and their standard deviation
+    def predict_spread(self, matrix):
+        members = self.predict_members(matrix)
+        return members.mean(axis=0), members.std(axis=0)
+
+"""
+Class: KerasModel
+
+Purpose: a Keras model behind the same interface as NumpyModel.
+"""
+class KerasModel:
+    def __init__(self, model):
+        self.model = model
+
+    def dense_layers(self):
+        layers = []
+        for layer in self.model.layers:
+            weights, biases = (np.asarray(array, dtype=np.float32) for array in layer.get_weights())
+            layers.append((weights, biases, layer.get_config()['activation']))
+        return layers
+
+    def predict(self, matrix):
+        # Call the model directly rather than through Model.predict(); predict() spins up a
+        # tf.data pipeline per call and deadlocks in worker processes forked after the model
+        # was loaded.
+        return self.model(np.asarray(matrix, dtype=np.float32), training=False).numpy()[:, 0]
+
+"""
+Function: load_keras_model()
+
+Purpose: load a Keras model file, importing TensorFlow only now.
+
+Parameters:
+    path: path of the .h5 file.
+
+Return:
+    the Keras model itself (not wrapped).
+"""
+def load_keras_model(path):
+    # this import often throws an error, so long as you have a compatible version of python however,
+    # it should work regardless.
+    from tensorflow.keras.models import load_model
+    return load_model(path)
+
+"""
+Function: load_model()
+
+Purpose: load a served model, by the extension of its file.
+
+Parameters:
+    path: a .npz file written by NumpyModel.save(), or a Keras .h5 file.
+
+Return:
+    a NumpyModel or KerasModel.
+"""
+def load_model(path):
+    if path.endswith('.npz'):
+        return NumpyModel.load(path)
+    return KerasModel(load_keras_model(path))
+
+"""
+Function: load_encoder()
+
+Purpose: load the encoder saved in a model file by NumpyModel.save().
+
+Parameters:
+    path: a model file.
+
+Return:
+    the TargetEncoder, or None if the file holds none (Keras .h5 files never do).
+"""
+def load_encoder(path):
+    if not path.endswith('.npz'):
+        return None
+    with np.load(path, allow_pickle=False) as arrays:
+        names = [name for name in arrays.files if name.startswith(encoder_prefix)]
+        if not names:
+            return None
+        return TargetEncoder.from_arrays({name[len(encoder_prefix):]: arrays[name] for name in names})
+
+"""
+Function: predict_with_spread()
+
+Purpose: predict, with the spread of the predictions when the model is an ensemble.
+
+Parameters:
+    model: the model.
+    matrix: the input matrix.
+
+Return:
+    the predictions, and the standard deviation of the members' predictions (None for a
+    single model).
+"""
+def predict_with_spread(model, matrix):
+    if isinstance(model, EnsembleModel):
+        return model.predict_spread(matrix)
+    return model.predict(matrix), None
+
+"""
+Function: compare_predictions()
+
+Purpose: measure how far one model's predictions are from another's.
+
+Parameters:
+    reference: the model to compare against.
+    candidate: the model to check.
+    matrix: the inputs to compare on.
+
+Return:
+    the largest absolute difference, in dollars, and the largest relative difference.
+"""
+def compare_predictions(reference, candidate, matrix):
+    expected = reference.predict(matrix).astype(np.float64)
+    actual = candidate.predict(matrix).astype(np.float64)
+    difference = np.abs(actual - expected)
+    return float(difference.max()), float((difference / np.maximum(np.abs(expected), 1)).max())
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the salary model weights for NumPy inference.')
+    parser.add_argument('--model', nargs='+', default=[os.path.join('.', 'Salary_Model.h5')],
+                        help='the Keras model to export; several models are exported as an ensemble')
+    parser.add_argument('--output', default=os.path.join('.', 'Salary_Model.npz'), help='the file to write')
+    parser.add_argument('--encoder', default=os.path.join('.', 'Salary_Encoder.npz'),
+                        help='the encoder the model was trained with, saved in the file with it')
+    parser.add_argument('--precision', choices=precisions, default='float16', help='precision of the stored weights (default float16)')
+    parser.add_argument('--tolerance', type=float, default=default_tolerance,
+                        help=f'largest difference from the Keras model accepted, in dollars (default {default_tolerance:g})')
+    args = parser.parse_args()
+
+    from pages.encoding import grid
+
+    encoder = TargetEncoder.load(args.encoder)
+    keras_models = [load_keras_model(path) for path in args.model]
+    if len(keras_models) == 1:
+        reference = KerasModel(keras_models[0])
+        exported = NumpyModel.from_keras(keras_models[0], args.precision)
+    else:
+        reference = EnsembleModel.from_models([NumpyModel.from_keras(model) for model in keras_models])
+        exported = EnsembleModel.from_models([NumpyModel.from_keras(model, args.precision) for model in keras_models])
+
+    # Check every input the app can be asked for
+    absolute, relative = compare_predictions(reference, exported, encoder.transform(*grid(encoder)))
+    print(f'{args.precision}: largest difference from the Keras model{"s" if len(keras_models) > 1 else ""} ${absolute:,.2f} ({relative:.4%})')
+    if absolute > args.tolerance:
+        print(f'Not written: the difference exceeds the tolerance of ${args.tolerance:,.2f}')
+        sys.exit(1)
+
+    exported.save(args.output, encoder)
+    print(f'Wrote {args.output} ({os.path.getsize(args.output):,} bytes)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Program: profiling.py
+
+Purpose: startup instrumentation. Each major initialization step (library imports, dataset
+         loads, model load, figure builds, page discovery and each page module) is timed
+         and its change in resident memory recorded. Steps are always recorded; the report
+         is only produced when STUB_ENHANCER_PROFILE_STARTUP is set:
+
+            STUB_ENHANCER_PROFILE_STARTUP=1            print the report to stderr
+            STUB_ENHANCER_PROFILE_STARTUP=report.json  also write it as JSON
+
+         It can also be run directly, which is how CI tracks startup regressions:
+
+            python -m pages.profiling --output startup.json --baseline baseline.json
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import sys
+import time
+
+"""
+Function: peak_rss_mb()
+
+Purpose: the peak resident memory of this process so far, in megabytes, or None where the
+         platform does not report it.
+"""
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+"""
+Function: current_rss_mb()
+
+Purpose: the resident memory of this process, in megabytes. Linux reports the current
+         value; elsewhere the peak is used, and 0 when neither is available.
+"""
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+
+    peak = peak_rss_mb()
+    return 0.0 if peak is None else peak
+
+"""
+Class: StartupProfiler
+
+Purpose: records named, possibly nested, startup steps with their wall time and memory
+         delta, and produces the startup report.
+"""
+class StartupProfiler:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.origin_rss = current_rss_mb()
+        self.records = []
+        self.depth = 0
+        self.total = None
+
+        setting = os.environ.get('STUB_ENHANCER_PROFILE_STARTUP', '')
+        self.enabled = setting != ''
+        self.output = setting if setting not in ('', '1') else None
+
+    @contextlib.contextmanager
+    def step(self, name):
+        # Reserve the slot now so parents are listed before their children
+        index = len(self.records)
+        self.records.append(None)
+        depth = self.depth
+        self.depth += 1
+
+        start = time.perf_counter()
+        start_rss = current_rss_mb()
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            rss = current_rss_mb()
+            self.records[index] = {
+                'name': name,
+                'depth': depth,
+                'seconds': round(time.perf_counter() - start, 4),
+                'rss_delta_mb': round(rss - start_rss, 2),
+                'rss_mb': round(rss, 2),
+            }
+
+    # Dash imports every page module itself during page discovery. While this is active
+    # (and profiling is enabled), each of those imports is recorded as its own step.
+    @contextlib.contextmanager
+    def page_imports(self):
+        if not self.enabled:
+            yield
+            return
+
+        original = importlib.util.spec_from_file_location
+        profiler = self
+
+        def spec_from_file_location(name, *args, **kwargs):
+            spec = original(name, *args, **kwargs)
+            if spec is not None and spec.loader is not None:
+                exec_module = spec.loader.exec_module
+
+                def timed_exec_module(module):
+                    with profiler.step(f'page module {name}'):
+                        exec_module(module)
+
+                spec.loader.exec_module = timed_exec_module
+            return spec
+
+        importlib.util.spec_from_file_location = spec_from_file_location
+        try:
+            yield
+        finally:
+            importlib.util.spec_from_file_location = original
+
+    def as_dict(self):
+        return {
+            'total_seconds': self.total['seconds'] if self.total else None,
+            'total_rss_delta_mb': self.total['rss_delta_mb'] if self.total else None,
+            'steps': [record for record in self.records if record is not None],
+        }
+
+    def report(self):
+        lines = [f'{"step":<60} {"seconds":>9} {"rss delta":>10} {"rss":>9}']
+        for record in self.as_dict()['steps']:
+            name = '  ' * record['depth'] + record['name']
+            lines.append(f'{name:<60} {record["seconds"]:>9.3f} {record["rss_delta_mb"]:>8.1f}MB {record["rss_mb"]:>7.1f}MB')
+        if self.total:
+            lines.append(f'{"total":<60} {self.total["seconds"]:>9.3f} {self.total["rss_delta_mb"]:>8.1f}MB')
+        return '\n'.join(lines)
+
+    def export(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    # Called once the app is ready to serve. Records the total and, if profiling was
+    # requested through the environment, prints and exports the report.
+    def finish(self):
+        self.total = {
+            'seconds': round(time.perf_counter() - self.origin, 4),
+            'rss_delta_mb': round(current_rss_mb() - self.origin_rss, 2),
+        }
+
+        if self.enabled:
+            print(self.report(), file=sys.stderr)
+        if self.output:
+            self.export(self.output)
+
+# The profiler used throughout startup.
+startup = StartupProfiler()
+
+"""
+Function: compare_reports()
+
+Purpose: compare a startup report against a baseline report.
+
+Parameters:
+    report: the current report (see StartupProfiler.as_dict()).
+    baseline: the baseline report.
+    tolerance: allowed relative slowdown, 0.25 allows steps to be 25% slower.
+    min_seconds: slowdowns smaller than this many seconds are ignored as noise.
+
+Return:
+    a list of messages, one per regressed step; empty when there is no regression.
+"""
+def compare_reports(report, baseline, tolerance=0.25, min_seconds=0.05):
+    regressions = []
+
+    current = {record['name']: record['seconds'] for record in report['steps']}
+    current['total'] = report['total_seconds']
+    previous = {record['name']: record['seconds'] for record in baseline['steps']}
+    previous['total'] = baseline['total_seconds']
+
+    for name, seconds in current.items():
+        if name not in previous or seconds is None or previous[name] is None:
+            continue
+        slowdown = seconds - previous[name]
+        if slowdown > min_seconds and seconds > previous[name] * (1 + tolerance):
+            regressions.append(f'{name}: {previous[name]:.3f}s -> {seconds:.3f}s')
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile the startup of StubEnhancer.')
+    parser.add_argument('--output', help='write the report to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON report, exit with 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown per step (default 0.25)')
+    parser.add_argument('--min-seconds', type=float, default=0.05, help='ignore slowdowns smaller than this (default 0.05)')
+    args = parser.parse_args()
+
+    # Run as a script this module is __main__; record into the copy the app imports.
+    from pages.profiling import startup as profiler
+
+    profiler.enabled = True
+    # Importing the app runs the whole startup, which calls profiler.finish() and prints the report
+    import app  # noqa: F401
+
+    report = profiler.as_dict()
+    if args.output:
+        profiler.export(args.output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance, args.min_seconds)
+        for regression in regressions:
+            print(f'Startup regression: {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+Program: registry.py
+
+Purpose: keeps track of the salary model being served and replaces it without a restart.
+         A background thread watches a model directory; when a new model file appears
+         there, it is loaded and checked on a set of canary inputs while the current model
+         keeps serving, and only a model that passes replaces it.
+
+         A model is served with the encoder of its inputs it was trained with: the one saved
+         in its file (see NumpyModel.save()), or for files without one, such as Keras .h5
+         files, the file next to it named like it with encoder_suffix. The two are loaded,
+         checked and versioned as one, and swapped in by a single assignment of the active
+         entry, so every request sees either the old pair or the new one, never a mix.
+
+         Callbacks read the model, its encoder and their version through the registry's
+         active entry instead of holding on to any of them.
+
+         Threads do not survive a fork, so under gunicorn the watcher is started in each
+         worker (see gunicorn.conf.py).
+"""
+import collections
+import glob
+import os
+import sys
+import threading
+
+import numpy as np
+
+from .fingerprint import file_fingerprint
+from .encoding import grid
+from .models import load_encoder, load_model
+from .target_encoding import TargetEncoder
+
+# Directory watched for new models, and how often it is checked, in seconds.
+model_dir = os.environ.get('STUB_ENHANCER_MODEL_DIR', os.path.join('.', 'models'))
+poll_interval = float(os.environ.get('STUB_ENHANCER_MODEL_POLL', '10'))
+
+# Model files the registry picks up, and the ending of the encoder file of a model saved
+# without its encoder.
+model_patterns = ('*.npz', '*.h5')
+encoder_suffix = '.encoder.npz'
+
+# Predictions a model must stay within, on every canary input, to be served.
+canary_min_salary = 1000.0
+canary_max_salary = 1000000.0
+
+# The model being served, the encoder of its inputs, the version of the pair (see
+# artifact_version()) and the file the model came from.
+ActiveModel = collections.namedtuple('ActiveModel', ['model', 'encoder', 'version', 'path'])
+
+# The encoder file of a model file saved without its encoder
+def sidecar_encoder_path(path):
+    return os.path.splitext(path)[0] + encoder_suffix
+
+"""
+Function: artifact_version()
+
+Purpose: the version of a model and its encoder: the fingerprint of the model file, and of
+         the encoder file too when the encoder is not saved in the model file.
+
+Parameters:
+    path: the model file.
+    encoder_path: the encoder file used when the model file holds none, by default the
+                  one next to it (see sidecar_encoder_path()).
+
+Return:
+    the version, and the encoder file (None when the encoder is in the model file).
+"""
+def artifact_version(path, encoder_path=None):
+    version = file_fingerprint(path)
+    if load_encoder(path) is not None:
+        return version, None
+    encoder_path = encoder_path or sidecar_encoder_path(path)
+    if not os.path.exists(encoder_path):
+        raise FileNotFoundError(f'no encoder saved in {path}, nor in {encoder_path}')
+    return f'{version}-{file_fingerprint(encoder_path)}', encoder_path
+
+"""
+Function: load_artifact()
+
+Purpose: load a model and the encoder it was trained with.
+
+Parameters:
+    path: the model file.
+    encoder_path: see artifact_version().
+
+Return:
+    the model, the encoder and the version of the pair.
+"""
+def load_artifact(path, encoder_path=None):
+    version, encoder_path = artifact_version(path, encoder_path)
+    model = load_model(path)
+    encoder = load_encoder(path) if encoder_path is None else TargetEncoder.load(encoder_path)
+    return model, encoder, version
+
+"""
+Function: validate_model()
+
+Purpose: check that a model gives sane predictions for every input its encoder can
+         encode, that is every input the app can send it.
+
+Parameters:
+    model: the model to check.
+    encoder: the encoder of its inputs.
+
+Return:
+    None if the model is fine, otherwise the reason it is not.
+"""
+def validate_model(model, encoder):
+    try:
+        canary_inputs = encoder.transform(*grid(encoder))
+        predictions = np.asarray(model.predict(canary_inputs), dtype=float)
+    except Exception as ex:
+        return f'prediction failed: {ex!r}'
+
+    if predictions.shape != (len(canary_inputs),):
+        return f'expected {len(canary_inputs)} predictions, got an array of shape {predictions.shape}'
+    if not np.isfinite(predictions).all():
+        return 'predictions are not all finite'
+    if predictions.min() < canary_min_salary or predictions.max() > canary_max_salary:
+        return f'predictions range from {predictions.min():,.2f} to {predictions.max():,.2f}'
+    return None
+
+"""
+Class: ModelRegistry
+
+Purpose: holds the active model and swaps in newer ones found in the model directory.
+"""
+class ModelRegistry:
+    def __init__(self, directory=model_dir, interval=poll_interval):
+        self.directory = directory
+        self.interval = interval
+        self.active = None
+        # Versions that failed validation, so they are not loaded again on every check
+        self.rejected = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.thread_pid = None
+
+    """
+    Function: activate()
+
+    Purpose: validate a model with its encoder and make the pair the active one.
+
+    Parameters:
+        model: the loaded model.
+        encoder: the encoder of its inputs.
+        path: the file the model was loaded from.
+        version: the version of the pair (see artifact_version()).
+
+    Return:
+        True if the model was activated, False if it failed validation.
+    """
+    def activate(self, model, encoder, path, version):
+        problem = validate_model(model, encoder)
+        if problem is not None:
+            self.rejected.add(version)
+            print(f'Model registry: rejected {path} ({version}): {problem}', file=sys.stderr)
+            return False
+
+        self.active = ActiveModel(model, encoder, version, path)
+        print(f'Model registry: serving {path} ({version})', file=sys.stderr)
+        return True
+
+    # The newest model file in the watched directory, or None
+    def newest_model_file(self):
+        paths = [path for pattern in model_patterns for path in glob.glob(os.path.join(self.directory, pattern))
+                 if not path.endswith(encoder_suffix)]
+        if not paths:
+            return None
+        return max(paths, key=os.path.getmtime)
+
+    """
+    Function: check()
+
+    Purpose: load, validate and activate the newest model in the directory, with its
+             encoder, if the pair is not already active (or already rejected). The current
+             model serves throughout.
+
+    Return:
+        True if a new model was activated.
+    """
+    def check(self):
+        with self.lock:
+            path = self.newest_model_file()
+            if path is None:
+                return False
+
+            try:
+                version, _ = artifact_version(path)
+            except Exception as ex:
+                # An unreadable file, or a model without an encoder. Rejected by the version of
+                # the file alone, so it is tried again once its encoder file is added.
+                try:
+                    version = file_fingerprint(path)
+                except OSError:
+                    # Removed between listing and reading
+                    return False
+                if version not in self.rejected:
+                    self.rejected.add(version)
+                    print(f'Model registry: could not load {path} ({version}): {ex!r}', file=sys.stderr)
+                return False
+            if (self.active is not None and version == self.active.version) or version in self.rejected:
+                return False
+
+            try:
+                model, encoder, version = load_artifact(path)
+            except Exception as ex:
+                self.rejected.add(version)
+                print(f'Model registry: could not load {path} ({version}): {ex!r}', file=sys.stderr)
+                return False
+
+            return self.activate(model, encoder, path, version)
+
+    def watch(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as ex:
+                # Keep watching; the active model is unaffected
+                print(f'Model registry: check failed: {ex!r}', file=sys.stderr)
+
+    """
+    Function: start()
+
+    Purpose: start watching the model directory in a background thread. Safe to call more
+             than once, and again after a fork; each process gets one watcher.
+
+    Return:
+        None
+    """
+    def start(self):
+        if self.interval <= 0:
+            return
+        if self.thread is not None and self.thread_pid == os.getpid() and self.thread.is_alive():
+            return
+
+        if self.thread_pid is not None and self.thread_pid != os.getpid():
+            # Forked: the parent's watcher may have held the lock at the time of the fork
+            self.lock = threading.Lock()
+
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.watch, name='model-registry', daemon=True)
+        self.thread_pid = os.getpid()
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
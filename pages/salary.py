@@ -1,4 +1,8 @@
 from .shared import generate_header, generate_navbar
+from .metrics import instrumented
+from .cache import cached
+from .figures import bar_figure
+from . import state
 
 import dash
 from dash import Dash, Input, Output, dcc, html, callback
@@ -24,7 +28,10 @@ credential_map = {
 
 credential_list = list(credential_map.keys())
 
-derived_df = pd.read_csv('./derived_data.csv')
+state.initialize()
+derived_df = state.derived_df
+# Rendered outputs are cached per version of the dataset
+data_version = state.data_version
 
 min_max_df = derived_df.loc[derived_df['Credential'] != 'Overall (All Graduates)']
 min_salary = int(math.floor(min_max_df['Average Income Ten Years After Graduation'].min() / 1000.0) * 1000.0) # Floor to closest multiple of 1000 (42,950 -> 42,000)
@@ -90,6 +97,7 @@ layout = html.Div(className="body", children=[
     Output(component_id='Salary-Range-Min', component_property='children'),
     Input(component_id='Salary-Range-Slider', component_property='value')
 )
+@instrumented
 def update_min_salary_text(salary_range):
     #return f'Min: ${salary_range[0]} CAD'
     return f'Min: ${min_salary:,} CAD'
@@ -99,6 +107,7 @@ def update_min_salary_text(salary_range):
     Output(component_id='Salary-Range-Max', component_property='children'),
     Input(component_id='Salary-Range-Slider', component_property='value')
 )
+@instrumented
 def update_max_salary_text(salary_range):
     #return f'Max: ${salary_range[1]} CAD'
     return f'Max: ${max_salary:,} CAD'
@@ -113,6 +122,8 @@ def update_max_salary_text(salary_range):
     Input(component_id='Salary-Range-Slider', component_property='value'),
     Input(component_id='Job-Display-Max', component_property='value')
 )
+@instrumented
+@cached(data_version)
 def update_jobs_by_salary_graph(credentials, salary_range, jobs_display_max):
     layout = go.Layout(
         margin=go.layout.Margin(
@@ -126,20 +137,19 @@ def update_jobs_by_salary_graph(credentials, salary_range, jobs_display_max):
         title='Fields With an Average Income Within the Selected Salary Range (2005-2014)',
         xaxis_title="Mean Income (CAD)", # xaxis_title="Field & Certification",
         yaxis_title="Field & Certification", # yaxis_title="Mean Income (CAD)",
+        # Remove field labels
+        yaxis=dict(visible=True, showticklabels=False, categoryorder='total ascending'),
+        xaxis=dict(visible=True, showticklabels=True, showgrid=True, zeroline=True, gridcolor='#666666', tickprefix='$'),
         # bargap=0,
-        barmode='group',
+        barmode='stack', # xaxis={'categoryorder': 'total descending'}
         uniformtext_minsize=10,
         uniformtext_mode='show',
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color="white"),
+        font=dict(color="white", size=14),
         showlegend=False
     )
 
-    figure = go.Figure(
-        layout=layout
-    )
-
     salary_min = salary_range[0]
     salary_max = salary_range[1]
 
@@ -161,45 +171,23 @@ def update_jobs_by_salary_graph(credentials, salary_range, jobs_display_max):
             '[0-9]{2}. ', '', regex=True)
 
         # Update Field of Study to include credential type (or else they'll group/overlap)
-        for index, row in dataframe.iterrows():
-            dataframe.loc[index, 'Field of Study (CIP code)'] = row['Field of Study (CIP code)'] + \
-                ' (' + row['Credential'] + ')'
-            dataframe.loc[index, 'Color'] = credential_map[row['Credential']]
-
-        for credential in credentials:
-            bar_df = dataframe.loc[dataframe['Credential'] == credential]
-
-            figure.add_trace(
-                go.Bar(
-                    x=bar_df['Average Income Ten Years After Graduation'], # x=bar_df['Field of Study (CIP code)'],
-                    y=bar_df['Field of Study (CIP code)'], # y=bar_df['Average Income Ten Years After Graduation'],
-                    #text=bar_df['Average Income Ten Years After Graduation'],
-                    texttemplate='%{y} %{x}', # texttemplate='%{x} %{y}',
-                    textposition="inside",
-                    marker=dict(color='#024B7A'),
-                    marker_line=dict(width=1, color='black'),
-                    marker_color=credential_map[credential],
-                    width=0.8, # width=0.5,
-                    hovertemplate='<extra></extra><br>Credential: %{y} <br>Average Median Income: %{x}', # hovertemplate='<extra></extra><br>Credential: %{x} <br>Average Median Income: %{y}',
-                    name=credential,
-                    showlegend=False,
-
-                    orientation='h'
-                )
-            )
-
-    # Remove field labels
-    figure.update_yaxes(visible=True, showticklabels=False) # figure.update_xaxes(visible=True, showticklabels=False)
-    figure.update_xaxes(visible=True, showticklabels=True, showgrid=True, zeroline=True, gridcolor='#666666')
-    #figure.update_traces(orientation='v', textangle=-90)
-
-    # Remove the grouping
-    figure.update_layout(barmode='stack',
-                        yaxis={'categoryorder': 'total ascending'},
-                        xaxis_tickprefix = '$',
-                        font=dict(
-                            size=14
-                        )) # figure.update_layout(barmode='stack', xaxis={'categoryorder': 'total descending'})
+        dataframe['Field of Study (CIP code)'] = dataframe['Field of Study (CIP code)'] + \
+            ' (' + dataframe['Credential'] + ')'
+
+    # Only the bars of the selected credentials themselves, all in one trace
+    bar_df = dataframe.loc[dataframe['Credential'].isin(credentials)] if len(credentials) > 0 else dataframe.iloc[:0]
+
+    figure = bar_figure(
+        layout,
+        bar_df['Field of Study (CIP code)'],
+        bar_df['Average Income Ten Years After Graduation'],
+        bar_df['Credential'].map(credential_map),
+        orientation='h',
+        #text=bar_df['Average Income Ten Years After Graduation'],
+        texttemplate='%{y} %{x}', # texttemplate='%{x} %{y}',
+        width=0.8, # width=0.5,
+        hovertemplate='<extra></extra><br>Credential: %{y} <br>Average Median Income: %{x}', # hovertemplate='<extra></extra><br>Credential: %{x} <br>Average Median Income: %{y}',
+    )
 
     chart = dcc.Graph(
         figure=figure,
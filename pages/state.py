@@ -0,0 +1,115 @@
+"""
+Program: state.py
+
+Purpose: the read-only state shared by every page: the datasets and the salary model.
+         initialize() builds it once, before the pages are imported. Under gunicorn this
+         happens in the master process (see gunicorn.conf.py), so the forked workers share
+         it copy-on-write instead of each loading their own copy.
+
+         Nothing here may be modified after initialize() returns; callbacks only read it.
+         The one exception is the active model, which the model registry may replace
+         (see registry.py).
+"""
+import os
+
+import pandas as pd
+
+from .fingerprint import file_fingerprint
+from .encoding import encoder_path
+from .profiling import startup
+from .registry import ModelRegistry, load_artifact
+
+derived_data_path = os.path.join('.', 'derived_data.csv')
+school_data_path = os.path.join('.', 'abSchool.csv')
+keras_model_path = os.path.join('.', 'Salary_Model.h5')
+compact_model_path = os.path.join('.', 'Salary_Model.npz')
+# The exported weights are served when present (see models.py), as they load without TensorFlow.
+model_path = os.environ.get('STUB_ENHANCER_MODEL') or (compact_model_path if os.path.exists(compact_model_path) else keras_model_path)
+
+# Summary dataset used by the home, salary and field pages.
+derived_df = None
+# Version of the dataset, used to key cached outputs.
+data_version = None
+# Dropdown options for the prediction page.
+creds_list = None
+yrs_list = None
+field_list = None
+# Serves the trained salary prediction model. Read model_registry.active for the current
+# model (a models.NumpyModel or models.KerasModel), the encoder of its inputs and their version.
+model_registry = ModelRegistry()
+
+initialized = False
+
+"""
+Function: load_prediction_options()
+
+Purpose: read the detailed dataset and return the unique credentials, years and fields
+         that the prediction dropdowns offer. Only the option lists are kept, not the
+         dataset itself.
+
+Parameters:
+    path: path of abSchool.csv.
+
+Return:
+    the lists of credentials, years after graduation, and fields of study.
+"""
+def load_prediction_options(path):
+    df = pd.read_csv(path, usecols=['Credential', 'Years After Graduation', 'Field of Study (2-digit CIP code)'])
+
+    creds = list(df["Credential"].unique())
+    yrs = list(df["Years After Graduation"].unique())
+    df["Field of Study (2-digit CIP code)"] = df["Field of Study (2-digit CIP code)"].str.replace('[0-9]{2}. ', '', regex=True)
+    fields = list(df["Field of Study (2-digit CIP code)"].unique())
+
+    return creds, yrs, fields
+
+"""
+Function: load_salary_model()
+
+Purpose: load the previously trained salary model and the encoder of its inputs.
+
+Parameters:
+    path: path of the exported weights (.npz) or of the saved Keras model (.h5).
+
+Return:
+    the model, the encoder and the version of the pair (see registry.load_artifact()). The
+    encoder is the one saved in the model file, or encoding.encoder_path for files without one.
+"""
+def load_salary_model(path):
+    if not path.endswith('.npz'):
+        with startup.step('import tensorflow'):
+            import tensorflow.keras.models  # noqa: F401
+
+    with startup.step('read model file'):
+        return load_artifact(path, encoder_path)
+
+"""
+Function: initialize()
+
+Purpose: build all of the shared state. Safe to call more than once; only the first
+         call does any work.
+
+Return:
+    None
+"""
+def initialize():
+    global derived_df, data_version, creds_list, yrs_list, field_list, initialized
+
+    if initialized:
+        return
+
+    with startup.step('dataset load: derived_data.csv'):
+        derived_df = pd.read_csv(derived_data_path)
+        data_version = file_fingerprint(derived_data_path)
+
+    with startup.step('dataset load: abSchool.csv'):
+        creds_list, yrs_list, field_list = load_prediction_options(school_data_path)
+
+    with startup.step('model load'):
+        model, encoder, version = load_salary_model(model_path)
+        if not model_registry.activate(model, encoder, model_path, version):
+            raise RuntimeError(f'The model {model_path} failed validation')
+        # A newer model may have been published to the model directory
+        model_registry.check()
+
+    initialized = True
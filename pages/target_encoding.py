@@ -0,0 +1,184 @@
+"""
+Program: target_encoding.py
+
+Purpose: the encoder of the salary model's inputs, shared by the training script (see
+         machine_learning/train.py), which fits it and saves it in the model file, and the
+         app, which loads it with the model (see registry.py).
+
+         Input matrix columns: [yrs, field, bach, cert, dip, doc, mast, prof]
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# The credential offset + this is the column of its one-hot encoding.
+credential_column_offset = 2
+
+"""
+Class: EncodingError
+
+Purpose: raised when a value has no encoding.
+"""
+class EncodingError(ValueError):
+    pass
+
+# The position of each value in an index, with the values formatted as plain Python values
+# (not NumPy scalars) in the error raised for unknown ones
+def lookup(index, values, name):
+    positions = index.get_indexer(values)
+    unknown = np.flatnonzero(positions < 0)
+    if len(unknown):
+        value = values[unknown[0]]
+        value = value.item() if isinstance(value, np.generic) else value
+        allowed = ', '.join(repr(known) for known in index.tolist())
+        raise EncodingError(f'Input {unknown[0]}: unknown {name} {value!r}, expected one of {allowed}')
+    return positions
+
+"""
+Class: TargetEncoder
+
+Purpose: turns (credential, field, years) values into the model's input matrix, with the
+         parameters it was fitted with when the model was trained.
+
+         Fields are target encoded: each field is replaced by the mean income of its rows,
+         smoothed towards the overall mean income (fields with few rows get pulled towards it
+         the most), and then normalized to a z-score. Years are normalized to a z-score, and
+         credentials are one-hot encoded, one column per credential in sorted order. Both
+         z-scores use the mean and population standard deviation over the training rows.
+
+Sources:
+    https://maxhalford.github.io/blog/target-encoding/
+    https://github.com/jeffheaton/t81_558_deep_learning
+"""
+class TargetEncoder:
+    def __init__(self, smoothing=2.0):
+        self.smoothing = smoothing
+        self.credential_index = None
+        self.field_index = None
+        self.field_means = None
+        self.field_mean = None
+        self.field_std = None
+        self.year_index = None
+        self.years_mean = None
+        self.years_std = None
+
+    """
+    Function: fit()
+
+    Purpose: compute the encoding of a training set.
+
+    Parameters:
+        credentials: the credential of each row.
+        fields: the field of study of each row, without its CIP code.
+        years: the years after graduation of each row.
+        incomes: the median income of each row, the target.
+
+    Return:
+        the encoder itself.
+    """
+    def fit(self, credentials, fields, years, incomes):
+        incomes = np.asarray(incomes, dtype=np.float64)
+        years = np.asarray(years)
+
+        # Smoothed mean income of each field, from the counts and sums of its rows
+        codes, field_names = pd.factorize(np.asarray(fields, dtype=object), sort=True)
+        counts = np.bincount(codes, minlength=len(field_names))
+        sums = np.bincount(codes, weights=incomes, minlength=len(field_names))
+        self.field_index = pd.Index(field_names)
+        self.field_means = (sums + self.smoothing * incomes.mean()) / (counts + self.smoothing)
+
+        row_field_means = self.field_means[codes]
+        self.field_mean = float(row_field_means.mean())
+        self.field_std = float(row_field_means.std())
+
+        self.year_index = pd.Index(np.unique(years))
+        self.years_mean = float(years.mean())
+        self.years_std = float(years.std())
+
+        self.credential_index = pd.Index(np.unique(np.asarray(credentials, dtype=object)))
+        return self
+
+    # Number of columns of the input matrix
+    @property
+    def input_size(self):
+        return credential_column_offset + len(self.credential_index)
+
+    """
+    Function: transform()
+
+    Purpose: turn arrays of raw inputs into the model's input matrix in one step.
+
+    Parameters:
+        credentials: the credential of each input, such as "Diploma".
+        fields: the field of study of each input, without its CIP code.
+        years: the years of experience of each input.
+
+    Return:
+        a (number of inputs x input_size) float array.
+    """
+    def transform(self, credentials, fields, years):
+        credentials = np.asarray(credentials, dtype=object)
+        fields = np.asarray(fields, dtype=object)
+        years = np.asarray(years)
+        if not len(credentials) == len(fields) == len(years):
+            raise EncodingError('Every input needs a credential, a field and years')
+
+        matrix = np.zeros((len(credentials), self.input_size))
+        matrix[:, 0] = (self.year_index.to_numpy()[lookup(self.year_index, years, 'years')] - self.years_mean) / self.years_std
+        matrix[:, 1] = (self.field_means[lookup(self.field_index, fields, 'field')] - self.field_mean) / self.field_std
+        matrix[np.arange(len(credentials)), credential_column_offset + lookup(self.credential_index, credentials, 'credential')] = 1
+        return matrix
+
+    # The parameters as arrays, for np.savez
+    def arrays(self):
+        return {
+            'smoothing': np.array(self.smoothing),
+            'credentials': np.array(self.credential_index.tolist()),
+            'fields': np.array(self.field_index.tolist()),
+            'field_means': self.field_means,
+            'field_normalization': np.array([self.field_mean, self.field_std]),
+            'years': self.year_index.to_numpy(),
+            'years_normalization': np.array([self.years_mean, self.years_std]),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        encoder = cls(float(arrays['smoothing']))
+        encoder.credential_index = pd.Index(arrays['credentials'].tolist())
+        encoder.field_index = pd.Index(arrays['fields'].tolist())
+        encoder.field_means = np.asarray(arrays['field_means'], dtype=np.float64)
+        encoder.field_mean, encoder.field_std = arrays['field_normalization'].tolist()
+        encoder.year_index = pd.Index(arrays['years'].tolist())
+        encoder.years_mean, encoder.years_std = arrays['years_normalization'].tolist()
+        return encoder
+
+    def save(self, path):
+        np.savez_compressed(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls.from_arrays(arrays)
+
+"""
+Function: prediction_grid()
+
+Purpose: predict every combination of the credentials, fields and years an encoder knows.
+
+Parameters:
+    encoder: the fitted encoder.
+    predict: a function taking the encoder's input matrix and returning one prediction per row.
+
+Return:
+    a dataframe with Credential, Field of Study, Years After Graduation and
+    Predicted Income columns, with years varying fastest, then fields, then credentials.
+"""
+def prediction_grid(encoder, predict):
+    credentials, fields, years = zip(*itertools.product(encoder.credential_index, encoder.field_index, encoder.year_index))
+    return pd.DataFrame({
+        'Credential': credentials,
+        'Field of Study': fields,
+        'Years After Graduation': years,
+        'Predicted Income': np.asarray(predict(encoder.transform(credentials, fields, years)), dtype=float).reshape(-1),
+    })
@@ -0,0 +1,15 @@
+"""
+Program: wsgi.py
+
+Purpose: production entry point. Exposes the Flask server behind the Dash app for a
+         WSGI server such as gunicorn:
+
+            gunicorn -c gunicorn.conf.py wsgi:server
+
+         Importing this module builds the whole application (datasets, model, page
+         layouts), so with preload_app enabled it happens once in the master process
+         and the workers share that memory copy-on-write after they are forked.
+"""
+from app import app
+
+server = app.server